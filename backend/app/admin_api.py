@@ -125,9 +125,8 @@ def list_active_products(
     return [_product_to_out(prod) for prod in paged]
 
 
-@router.post("/products", response_model=ProductOut)
-def create_or_update_product(product: ProductIn, _: None = Depends(require_admin)):
-    payload = {
+def _product_payload(product: ProductIn) -> Dict[str, object]:
+    return {
         "sku": product.sku,
         "name": product.name,
         "description": product.description,
@@ -140,6 +139,11 @@ def create_or_update_product(product: ProductIn, _: None = Depends(require_admin
         "tags": product.tags,
         "is_active": product.active,
     }
+
+
+@router.post("/products", response_model=ProductOut)
+def create_or_update_product(product: ProductIn, _: None = Depends(require_admin)):
+    payload = _product_payload(product)
     data = catalog_store.upsert_product(product.company_id, payload)
     
     # Auto-refresh catalog cache
@@ -152,6 +156,36 @@ def create_or_update_product(product: ProductIn, _: None = Depends(require_admin
     return _product_to_out(data)
 
 
+@router.post("/products/bulk", response_model=List[ProductOut])
+def create_or_update_products_bulk(products: List[ProductIn], _: None = Depends(require_admin)):
+    """
+    Upsert many products in one transaction per company.
+    The catalog cache and the indexes are refreshed once for the whole batch.
+    """
+    by_company: Dict[str, List[Dict[str, object]]] = {}
+    for product in products:
+        by_company.setdefault(product.company_id, []).append(_product_payload(product))
+
+    for company_id, payloads in by_company.items():
+        catalog_store.upsert_products_bulk(company_id, payloads)
+
+    if not by_company:
+        return []
+
+    # Auto-refresh catalog cache
+    from main import refresh_catalog_cache
+    refresh_catalog_cache(force=True)
+
+    result: List[ProductOut] = []
+    for company_id, payloads in by_company.items():
+        skus = [payload["sku"] for payload in payloads]
+        # Auto-rebuild index for the changed products
+        index_manager.update_index(company_id, skus)
+        rows = catalog_store.list_products(company_id, include_deleted=True, filter_skus=skus)
+        result.extend(_product_to_out(row) for row in rows)
+    return result
+
+
 @router.put("/products/{sku}", response_model=ProductOut)
 def update_product(
     sku: str,
@@ -206,10 +240,11 @@ def delete_product_route(sku: str, company_id: str = Query(...), _: None = Depen
 @router.post("/synonyms", response_model=Dict[str, List[str]])
 def add_synonyms(payload: SynonymIn, _: None = Depends(require_admin)):
     canon = normalize_query(payload.canon)
-    for variant in payload.synonyms:
-        norm_variant = normalize_query(variant)
-        if norm_variant:
-            catalog_store.add_synonym(payload.company_id, canon, norm_variant)
+    variants = [normalize_query(variant) for variant in payload.synonyms]
+    catalog_store.add_synonyms_bulk(
+        payload.company_id,
+        [(canon, norm_variant) for norm_variant in variants if norm_variant],
+    )
     return list_synonyms(company_id=payload.company_id)
 
 
@@ -1,6 +1,19 @@
 import json, re
 from typing import List, Dict, Any
 
+# jiter ships with the openai client; fall back to the stdlib parser without it.
+try:
+    from jiter import from_json as _jiter_from_json
+except ImportError:  # pragma: no cover - optional fast path
+    _jiter_from_json = None
+
+
+def _loads(s: str) -> Any:
+    if _jiter_from_json is None:
+        return json.loads(s)
+    return _jiter_from_json(s.encode("utf-8"))
+
+
 def extract_products_from_output(output: str) -> List[str]:
     bad = ("angebot wird", "ich erstelle", "perfekt", "sammle", "gerne")
     out: List[str] = []
@@ -32,7 +45,7 @@ def clean_json_string(s: str) -> str:
 
 
 def parse_positions(llm2_json: str) -> List[Dict[str, Any]]:
-    raw = json.loads(clean_json_string(llm2_json))
+    raw = _loads(clean_json_string(llm2_json))
     if isinstance(raw, dict):
         raw = [raw]
     if not isinstance(raw, list):
@@ -16,6 +16,9 @@ try:  # pragma: no cover - optional dependency
 except ModuleNotFoundError:  # pragma: no cover - optional dependency
     yaml = None
 
+# Prefer libyaml's C parser when PyYAML was built with it.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", None) or getattr(yaml, "SafeLoader", None)
+
 PRODUCT_HEADERS = ["sku", "name", "description", "unit", "volume_l", "price_eur", "active"]
 TRUTHY = {"1", "true", "yes", "y", "on"}
 FALSY = {"0", "false", "no", "n", "off"}
@@ -161,7 +164,7 @@ def _read_yaml_mapping(path: Path) -> Dict[str, List[str]]:
         raise CLIError("PyYAML is required for YAML operations. Please install pyyaml.")
     if not path.exists():
         raise CLIError(f"File not found: {path}")
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    data = yaml.load(path.read_text(encoding="utf-8"), Loader=_YAML_LOADER) or {}
     if not isinstance(data, dict):
         raise CLIError("Synonym YAML must define a mapping of canon -> [variants].")
     normalized: Dict[str, List[str]] = {}
@@ -209,8 +212,8 @@ def cmd_import_products(args: argparse.Namespace) -> None:
     else:
         products = _read_products_from_json(path)
     existing = {
-        prod["sku"]
-        for prod in catalog_store.list_products(company_id, include_deleted=True)
+        row["sku"]
+        for row in catalog_store.list_products_rows(company_id, include_deleted=True)
     }
     inserted = 0
     updated = 0
@@ -220,15 +223,18 @@ def cmd_import_products(args: argparse.Namespace) -> None:
         else:
             inserted += 1
             existing.add(product["sku"])
-        catalog_store.upsert_product(
-            company_id,
+    catalog_store.upsert_products_bulk(
+        company_id,
+        [
             {
                 "sku": product["sku"],
                 "name": product["name"],
                 "description": product["description"],
                 "is_active": product["is_active"],
-            },
-        )
+            }
+            for product in products
+        ],
+    )
     if args.rebuild_index:
         index_manager.rebuild_index(company_id)
         stats = index_manager.index_stats(company_id)
@@ -259,11 +265,10 @@ def cmd_import_synonyms(args: argparse.Namespace) -> None:
     mapping = _read_yaml_mapping(path)
     if args.clear_existing:
         catalog_store.clear_synonyms(company_id)
-    inserted = 0
-    for canon, variants in mapping.items():
-        for variant in variants:
-            catalog_store.insert_synonym(company_id, canon, variant)
-            inserted += 1
+    inserted = catalog_store.add_synonyms_bulk(
+        company_id,
+        [(canon, variant) for canon, variants in mapping.items() for variant in variants],
+    )
     print(f"Imported {inserted} synonyms for {company_id}.")
 
 
@@ -307,7 +312,7 @@ def cmd_update_index(args: argparse.Namespace) -> None:
 def cmd_stats(args: argparse.Namespace) -> None:
     company_id = args.company_id
     active = len(catalog_store.get_active_products(company_id))
-    total = len(catalog_store.list_products(company_id, include_deleted=True))
+    total = len(catalog_store.list_products_rows(company_id, include_deleted=True))
     synonyms = sum(len(values) for values in catalog_store.list_synonyms(company_id).values())
     stats = index_manager.index_stats(company_id)
     print(
@@ -8,13 +8,30 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from math import sqrt
 from datetime import datetime
+from importlib.metadata import PackageNotFoundError, version
 
 from store import catalog_store
 from store.catalog_store import get_active_products
 
 logger = logging.getLogger("kalkulai.index")
 
+
+def _docarray_has_document_api() -> bool:
+    """Check the installed docarray release without importing it.
+
+    docarray>=0.30 dropped ``Document``/``DocumentArray``; importing the package
+    only to hit that ImportError costs over a second (it pulls in torch).
+    """
+    try:
+        major, minor = (int(part) for part in version("docarray").split(".")[:2])
+    except (PackageNotFoundError, ValueError):
+        return False
+    return (major, minor) < (0, 30)
+
+
 try:
+    if not _docarray_has_document_api():
+        raise ImportError("docarray with Document/DocumentArray is not installed")
     from docarray import Document, DocumentArray
     from docarray.index.backends.inmemory import InMemoryExactNNIndex as DocArrayExactNN
 
@@ -89,6 +106,19 @@ def _get_embedder():
     return _EMBEDDER
 
 
+def reset_state(embedder: Optional[Any] = None) -> None:
+    """Drop every cached company index (test helper).
+
+    The embedder is kept unless ``embedder`` is given, which replaces it.
+    """
+
+    global _EMBEDDER
+    with _CACHE_LOCK:
+        _INDEX_CACHE.clear()
+    if embedder is not None:
+        _EMBEDDER = embedder
+
+
 def _product_to_text(product: Dict[str, Any]) -> str:
     name = product.get("name") or ""
     description = product.get("description") or ""
@@ -1,23 +1,31 @@
 from .catalog_store import (
     add_synonym,
+    add_synonyms_bulk,
     clear_synonyms,
     delete_product,
     get_active_products,
     init_db,
     insert_synonym,
     list_products,
+    list_products_rows,
     list_synonyms,
+    truncate_all,
     upsert_product,
+    upsert_products_bulk,
 )
 
 __all__ = [
     "add_synonym",
+    "add_synonyms_bulk",
     "clear_synonyms",
     "delete_product",
     "get_active_products",
     "init_db",
     "insert_synonym",
     "list_products",
+    "list_products_rows",
     "list_synonyms",
+    "truncate_all",
     "upsert_product",
+    "upsert_products_bulk",
 ]
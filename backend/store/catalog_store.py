@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import datetime
+from itertools import groupby
 import logging
+from operator import itemgetter
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
 try:  # Preferred
+    from sqlalchemy.pool import StaticPool
     from sqlmodel import Field, Session, SQLModel, UniqueConstraint, create_engine, select
 
     _HAS_SQLMODEL = True
@@ -17,10 +22,31 @@ except ImportError:  # Fallback to sqlite3
 
     _HAS_SQLMODEL = False
 
-_PRIMARY_DB_URL = os.getenv("DB_URL")
-DB_URL = _PRIMARY_DB_URL or os.getenv("KALKULAI_DB_URL") or "sqlite:///backend/var/kalkulai.db"
+def _configured_db_url() -> str:
+    return os.getenv("DB_URL") or os.getenv("KALKULAI_DB_URL") or "sqlite:///backend/var/kalkulai.db"
+
+
+DB_URL = _configured_db_url()
 _engine = None
 _engine_url = None
+_TLS = threading.local()
+
+# Column order shared by every product read; the id column is never exposed.
+_PRODUCT_COLUMNS = (
+    "company_id",
+    "sku",
+    "name",
+    "description",
+    "price_eur",
+    "unit",
+    "volume_l",
+    "category",
+    "material_type",
+    "unit_package",
+    "tags",
+    "is_active",
+    "updated_at",
+)
 
 
 def _ensure_sqlite_dir(url: str) -> str:
@@ -29,12 +55,56 @@ def _ensure_sqlite_dir(url: str) -> str:
     filename = url.replace("sqlite:///", "", 1)
     if filename == ":memory:":
         return ":memory:"
+    if filename.startswith("file:"):
+        # SQLite URI filename, e.g. a named shared-cache in-memory database
+        return filename
     Path(filename).parent.mkdir(parents=True, exist_ok=True)
     return filename
 
 
 _DB_PATH = _ensure_sqlite_dir(DB_URL)
 _MEM_ANCHOR = None
+# Databases whose schema/migration step already ran in this process.
+_INITIALIZED: Set[str] = set()
+
+# Read cache for the hot catalog lookups (sqlite3 backend only). An entry is
+# served while neither this process wrote to the company (per-company write
+# version) nor any other connection committed to the database file, which
+# ``PRAGMA data_version`` reports. That counter is per connection, so each
+# thread's cache lives next to its connection in ``_TLS``.
+_WRITE_VERSION: Dict[str, int] = defaultdict(int)
+
+
+def _bump_version(company_id: str) -> None:
+    _WRITE_VERSION[company_id] += 1
+
+
+def _cached_read(fn_name: str, company_id: str, loader: Callable[[], Any]) -> Any:
+    """Return ``loader()``, reusing this thread's result while the data is unchanged.
+
+    A hit is not free: every call runs ``PRAGMA data_version`` on the thread's
+    connection. That statement reads no table pages, but it is still one SQL
+    round-trip per lookup, traded for not re-reading and re-normalizing every row.
+
+    Writes through this module bump the company's write version, which every
+    thread sees. ``truncate_all`` only empties the calling thread's cache; other
+    threads notice the truncation through ``data_version`` alone, as they do for
+    any commit made on another connection.
+    """
+
+    if _HAS_SQLMODEL:
+        # Pooled connections have no comparable change counter; always read.
+        return loader()
+    conn = _sqlite_conn()
+    stamp = (_WRITE_VERSION[company_id], conn.execute("PRAGMA data_version").fetchone()[0])
+    cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = _TLS.read_cache
+    key = (fn_name, company_id)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    result = loader()
+    cache[key] = (stamp, result)
+    return result
 
 
 if _HAS_SQLMODEL:
@@ -80,8 +150,13 @@ def _get_engine():
         raise RuntimeError("SQLModel is unavailable; use sqlite fallback helpers instead.")
     global _engine, _engine_url
     if _engine is None or _engine_url != DB_URL:
-        connect_args = {"check_same_thread": False} if DB_URL.startswith("sqlite") else {}
-        _engine = create_engine(DB_URL, echo=False, connect_args=connect_args)
+        kwargs: Dict[str, Any] = {}
+        if DB_URL.startswith("sqlite"):
+            kwargs["connect_args"] = {"check_same_thread": False}
+            if _is_memory_db(_DB_PATH):
+                # Every session must see the same in-memory database.
+                kwargs["poolclass"] = StaticPool
+        _engine = create_engine(DB_URL, echo=False, **kwargs)
         _engine_url = DB_URL
     return _engine
 
@@ -90,19 +165,26 @@ def _session() -> Session:
     return Session(_get_engine())
 
 
-def _ensure_sqlite_dir(url: str) -> str:
-    if not url.startswith("sqlite:///"):
-        return url
-    filename = url.replace("sqlite:///", "", 1)
-    if filename == ":memory:":
-        return ":memory:"
-    Path(filename).parent.mkdir(parents=True, exist_ok=True)
-    return filename
+def _is_memory_db(path: str) -> bool:
+    return path == ":memory:" or (path.startswith("file:") and "mode=memory" in path)
 
 
 def _sqlite_conn():
+    """Return this thread's connection to the configured database.
+
+    Connections are opened once per thread and path and then reused, so the
+    hot read/write helpers do not reopen the database file on every call.
+    """
+
     global _MEM_ANCHOR
-    if _DB_PATH == ":memory:":
+    cached = getattr(_TLS, "sqlite_conn", None)
+    if cached is not None and cached[0] == _DB_PATH:
+        return cached[1]
+    if _DB_PATH.startswith("file:"):
+        if _is_memory_db(_DB_PATH) and _MEM_ANCHOR is None:
+            _MEM_ANCHOR = sqlite3.connect(_DB_PATH, uri=True)
+        conn = sqlite3.connect(_DB_PATH, uri=True)
+    elif _DB_PATH == ":memory:":
         uri = "file:kalkulai_mem?mode=memory&cache=shared"
         if _MEM_ANCHOR is None:
             _MEM_ANCHOR = sqlite3.connect(uri, uri=True)
@@ -111,12 +193,38 @@ def _sqlite_conn():
     else:
         conn = sqlite3.connect(_DB_PATH)
     conn.row_factory = sqlite3.Row
+    _TLS.sqlite_conn = (_DB_PATH, conn)
+    _TLS.read_cache = {}
     return conn
 
 
+def _init_key() -> str:
+    if _HAS_SQLMODEL:
+        return DB_URL
+    if _is_memory_db(_DB_PATH):
+        # The shared in-memory database only lives as long as its anchor connection.
+        return f"{_DB_PATH}:{id(_MEM_ANCHOR)}"
+    return _DB_PATH
+
+
+# Read path filters on company_id AND is_active; (company_id, sku) lookups use the
+# unique key.
+_PRODUCT_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS idx_products_company_active ON products(company_id, is_active)",
+)
+
+
 def init_db() -> None:
+    if _init_key() in _INITIALIZED:
+        return
     if _HAS_SQLMODEL:
-        SQLModel.metadata.create_all(_get_engine())
+        engine = _get_engine()
+        SQLModel.metadata.create_all(engine)
+        # create_all leaves existing tables alone, so indexes added later go in here.
+        with engine.begin() as conn:
+            for statement in _PRODUCT_INDEX_DDL:
+                conn.exec_driver_sql(statement)
+        _INITIALIZED.add(_init_key())
         return
     with _sqlite_conn() as conn:
         # Create products table with all fields
@@ -145,6 +253,8 @@ def init_db() -> None:
         # Migrate existing table: Add new columns if they don't exist
         cursor = conn.execute("PRAGMA table_info(products)")
         existing_columns = {row[1] for row in cursor.fetchall()}
+        global _HAS_IS_DELETED
+        _HAS_IS_DELETED = "is_deleted" in existing_columns
         
         new_columns = {
             "price_eur": "REAL",
@@ -165,6 +275,8 @@ def init_db() -> None:
                     print(f"⚠️  Migration warning: Could not add column '{col_name}': {e}")
         
         conn.execute("CREATE INDEX IF NOT EXISTS idx_products_company ON products(company_id)")
+        for statement in _PRODUCT_INDEX_DDL:
+            conn.execute(statement)
         
         # Only create category index if column exists
         if "category" in existing_columns or "category" in new_columns:
@@ -188,9 +300,57 @@ def init_db() -> None:
             """
         )
         conn.commit()
-
-
-def upsert_product(company_id: str, product_dict: Dict[str, object]) -> Dict[str, object]:
+    _INITIALIZED.add(_init_key())
+
+
+_SQL_UPSERT_PRODUCT = """
+    INSERT INTO products(
+        company_id, sku, name, description, 
+        price_eur, unit, volume_l, 
+        category, material_type, unit_package, tags,
+        is_active, updated_at
+    )
+    VALUES (
+        :cid, :sku, :name, :desc, 
+        :price, :unit, :volume,
+        :category, :material_type, :unit_package, :tags,
+        :active, :updated
+    )
+    ON CONFLICT(company_id, sku) DO UPDATE SET
+        name = excluded.name,
+        description = excluded.description,
+        price_eur = excluded.price_eur,
+        unit = excluded.unit,
+        volume_l = excluded.volume_l,
+        category = excluded.category,
+        material_type = excluded.material_type,
+        unit_package = excluded.unit_package,
+        tags = excluded.tags,
+        is_active = excluded.is_active,
+        updated_at = excluded.updated_at
+"""
+
+
+# SQLite >= 3.35 can hand the upserted row back directly; older builds re-select it.
+_SQLITE_HAS_RETURNING = not _HAS_SQLMODEL and sqlite3.sqlite_version_info >= (3, 35, 0)
+_SQL_REACTIVATE_SET = "        , is_deleted = CASE WHEN :reactivating THEN 0 ELSE is_deleted END\n"
+_SQL_RETURNING_PRODUCT = "    RETURNING " + ", ".join(_PRODUCT_COLUMNS) + "\n"
+
+# Whether the products table carries a legacy ``is_deleted`` column; recorded by
+# init_db(). ``None`` means unknown, which keeps the separate reactivation UPDATE.
+_HAS_IS_DELETED: Optional[bool] = None
+
+
+def _product_upsert_sql(returning: bool = False) -> str:
+    sql = _SQL_UPSERT_PRODUCT
+    if _HAS_IS_DELETED:
+        sql += _SQL_REACTIVATE_SET
+    if returning:
+        sql += _SQL_RETURNING_PRODUCT
+    return sql
+
+
+def _prepare_product_params(company_id: str, product_dict: Dict[str, object], updated: str) -> Dict[str, object]:
     if "sku" not in product_dict or "name" not in product_dict:
         raise ValueError("Product must contain 'sku' and 'name'.")
     sku = str(product_dict["sku"]).strip()
@@ -232,81 +392,69 @@ def upsert_product(company_id: str, product_dict: Dict[str, object]) -> Dict[str
     is_active_specified = is_active_raw is not None
     is_active_val = bool(is_active_raw) if is_active_specified else True
     reactivating = bool(is_active_raw) if is_active_specified else False
-    updated = datetime.utcnow().isoformat()
+
+    return {
+        "cid": company_id,
+        "sku": sku,
+        "name": name,
+        "desc": desc_val,
+        "price": price_val,
+        "unit": unit_val,
+        "volume": volume_val,
+        "category": category_val,
+        "material_type": material_type_val,
+        "unit_package": unit_package_val,
+        "tags": tags_val,
+        "active": 1 if is_active_val else 0,
+        "updated": updated,
+        "reactivating": reactivating,
+    }
+
+
+def _apply_product_params(product: "Product", params: Dict[str, object]) -> None:
+    product.name = params["name"]
+    product.description = params["desc"]
+    product.price_eur = params["price"]
+    product.unit = params["unit"]
+    product.volume_l = params["volume"]
+    product.category = params["category"]
+    product.material_type = params["material_type"]
+    product.unit_package = params["unit_package"]
+    product.tags = params["tags"]
+    product.is_active = bool(params["active"])
+    if params["reactivating"] and hasattr(product, "is_deleted"):
+        setattr(product, "is_deleted", False)
+    product.updated_at = datetime.fromisoformat(params["updated"])
+
+
+def upsert_product(company_id: str, product_dict: Dict[str, object]) -> Dict[str, object]:
+    params = _prepare_product_params(company_id, product_dict, datetime.utcnow().isoformat())
+    sku = params["sku"]
 
     if _HAS_SQLMODEL:
         with _session() as session:
             stmt = select(Product).where(Product.company_id == company_id, Product.sku == sku)
             product = session.exec(stmt).one_or_none()
             if product is None:
-                product = Product(company_id=company_id, sku=sku, name=name)
+                product = Product(company_id=company_id, sku=sku, name=params["name"])
                 session.add(product)
-            product.name = name
-            product.description = desc_val
-            product.price_eur = price_val
-            product.unit = unit_val
-            product.volume_l = volume_val
-            product.category = category_val
-            product.material_type = material_type_val
-            product.unit_package = unit_package_val
-            product.tags = tags_val
-            product.is_active = is_active_val
-            if reactivating and hasattr(product, "is_deleted"):
-                setattr(product, "is_deleted", False)
-            product.updated_at = datetime.fromisoformat(updated)
+            _apply_product_params(product, params)
             session.commit()
             session.refresh(product)
             data = product.dict()
             data.pop("id", None)
+            _bump_version(company_id)
             trigger_synonym_regeneration(company_id)
             return data
 
     with _sqlite_conn() as conn:
-        conn.execute(
-            """
-            INSERT INTO products(
-                company_id, sku, name, description, 
-                price_eur, unit, volume_l, 
-                category, material_type, unit_package, tags,
-                is_active, updated_at
-            )
-            VALUES (
-                :cid, :sku, :name, :desc, 
-                :price, :unit, :volume,
-                :category, :material_type, :unit_package, :tags,
-                :active, :updated
-            )
-            ON CONFLICT(company_id, sku) DO UPDATE SET
-                name = excluded.name,
-                description = excluded.description,
-                price_eur = excluded.price_eur,
-                unit = excluded.unit,
-                volume_l = excluded.volume_l,
-                category = excluded.category,
-                material_type = excluded.material_type,
-                unit_package = excluded.unit_package,
-                tags = excluded.tags,
-                is_active = excluded.is_active,
-                updated_at = excluded.updated_at
-            """,
-            {
-                "cid": company_id,
-                "sku": sku,
-                "name": name,
-                "desc": desc_val,
-                "price": price_val,
-                "unit": unit_val,
-                "volume": volume_val,
-                "category": category_val,
-                "material_type": material_type_val,
-                "unit_package": unit_package_val,
-                "tags": tags_val,
-                "active": 1 if is_active_val else 0,
-                "updated": updated,
-            },
-        )
+        if _SQLITE_HAS_RETURNING:
+            row = conn.execute(_product_upsert_sql(returning=True), params).fetchone()
+        else:
+            conn.execute(_product_upsert_sql(), params)
+            row = None
         conn.commit()
-        if reactivating:
+        if params["reactivating"] and _HAS_IS_DELETED is None:
             try:
                 conn.execute(
                     "UPDATE products SET is_deleted=0 WHERE company_id=? AND sku=?",
@@ -315,27 +463,92 @@ def upsert_product(company_id: str, product_dict: Dict[str, object]) -> Dict[str
                 conn.commit()
             except Exception:
                 pass
-        row = conn.execute(
-            """
-            SELECT company_id, sku, name, description, 
-                   price_eur, unit, volume_l,
-                   category, material_type, unit_package, tags,
-                   is_active, updated_at 
-            FROM products 
-            WHERE company_id=? AND sku=?
-            """,
-            (company_id, sku),
-        ).fetchone()
+        if row is None:
+            row = conn.execute(
+                """
+                SELECT company_id, sku, name, description, 
+                       price_eur, unit, volume_l,
+                       category, material_type, unit_package, tags,
+                       is_active, updated_at 
+                FROM products 
+                WHERE company_id=? AND sku=?
+                """,
+                (company_id, sku),
+            ).fetchone()
         result = _normalize_product_row(dict(row))
+        _bump_version(company_id)
         trigger_synonym_regeneration(company_id)
         return result
 
 
+def upsert_products_bulk(company_id: str, products: List[Dict[str, object]]) -> int:
+    """Upsert many products in one transaction and return the number written.
+
+    The ``updated_at`` timestamp is computed once and shared by every row.
+    """
+
+    updated = datetime.utcnow().isoformat()
+    rows = [_prepare_product_params(company_id, product, updated) for product in products]
+    if not rows:
+        return 0
+
+    if _HAS_SQLMODEL:
+        with _session() as session:
+            stmt = select(Product).where(
+                Product.company_id == company_id,
+                Product.sku.in_([params["sku"] for params in rows]),
+            )
+            existing = {product.sku: product for product in session.exec(stmt).all()}
+            for params in rows:
+                product = existing.get(params["sku"])
+                if product is None:
+                    product = Product(company_id=company_id, sku=params["sku"], name=params["name"])
+                    session.add(product)
+                    existing[params["sku"]] = product
+                _apply_product_params(product, params)
+            session.commit()
+    else:
+        with _sqlite_conn() as conn:
+            conn.executemany(_product_upsert_sql(), rows)
+            reactivated = [(company_id, params["sku"]) for params in rows if params["reactivating"]]
+            conn.commit()
+            if reactivated and _HAS_IS_DELETED is None:
+                try:
+                    conn.executemany("UPDATE products SET is_deleted=0 WHERE company_id=? AND sku=?", reactivated)
+                    conn.commit()
+                except Exception:
+                    pass
+            # Refresh planner statistics now that the table holds the import. PRAGMA
+            # optimize before SQLite 3.46 skips tables this connection has not queried
+            # yet, so analyze explicitly, sampling at most ~400 rows per index.
+            conn.execute("PRAGMA analysis_limit=400")
+            conn.execute("ANALYZE products")
+
+    _bump_version(company_id)
+    trigger_synonym_regeneration(company_id)
+    return len(rows)
+
+
 def list_products(
     company_id: str,
     include_deleted: bool = False,
     filter_skus: Optional[List[str]] = None,
 ) -> List[Dict[str, object]]:
+    rows = list_products_rows(company_id, include_deleted=include_deleted, filter_skus=filter_skus)
+    return [_normalize_product_row(dict(row)) for row in rows]
+
+
+def list_products_rows(
+    company_id: str,
+    include_deleted: bool = False,
+    filter_skus: Optional[List[str]] = None,
+) -> List[Any]:
+    """Like :func:`list_products` but returns the raw database rows.
+
+    Rows support ``row["sku"]`` access only; use this for internal callers
+    that read a few fields and do not need a dict per product.
+    """
+
     if _HAS_SQLMODEL:
         with _session() as session:
             stmt = select(Product).where(Product.company_id == company_id)
@@ -359,11 +572,16 @@ def list_products(
             placeholders = ",".join(["?"] * len(filter_skus))
             query += f" AND sku IN ({placeholders})"
             params.extend(filter_skus)
-        rows = conn.execute(query, tuple(params)).fetchall()
-        return [_normalize_product_row(dict(r)) for r in rows]
+        return conn.execute(query, tuple(params)).fetchall()
 
 
 def get_active_products(company_id: str) -> List[Dict[str, object]]:
+    products = _cached_read("get_active_products", company_id, lambda: _load_active_products(company_id))
+    # Per-row copies: callers may edit the dicts without touching the cache.
+    return [dict(product) for product in products]
+
+
+def _load_active_products(company_id: str) -> List[Dict[str, object]]:
     if _HAS_SQLMODEL:
         with _session() as session:
             stmt = select(Product).where(Product.company_id == company_id, Product.is_active.is_(True))
@@ -393,6 +611,7 @@ def delete_product(company_id: str, sku: str) -> bool:
             product.updated_at = timestamp
             session.add(product)
             session.commit()
+            _bump_version(company_id)
             trigger_synonym_regeneration(company_id)
             return True
     with _sqlite_conn() as conn:
@@ -403,11 +622,17 @@ def delete_product(company_id: str, sku: str) -> bool:
         conn.commit()
         result = cur.rowcount > 0
         if result:
+            _bump_version(company_id)
             trigger_synonym_regeneration(company_id)
         return result
 
 
 def list_synonyms(company_id: str) -> Dict[str, List[str]]:
+    mapping = _cached_read("list_synonyms", company_id, lambda: _load_synonyms(company_id))
+    return {canon: list(variants) for canon, variants in mapping.items()}
+
+
+def _load_synonyms(company_id: str) -> Dict[str, List[str]]:
     if _HAS_SQLMODEL:
         with _session() as session:
             stmt = select(Synonym).where(Synonym.company_id == company_id)
@@ -420,10 +645,8 @@ def list_synonyms(company_id: str) -> Dict[str, List[str]]:
             "SELECT canon, variant FROM synonyms WHERE company_id=? ORDER BY canon",
             (company_id,),
         ).fetchall()
-        mapping: Dict[str, List[str]] = {}
-        for row in rows:
-            mapping.setdefault(row["canon"], []).append(row["variant"])
-        return mapping
+        # Rows arrive ordered by canon, so each canon forms one contiguous group.
+        return {canon: [row["variant"] for row in group] for canon, group in groupby(rows, key=itemgetter("canon"))}
 
 
 def add_synonym(company_id: str, canon: str, variant: str, confidence: float = 0.9) -> Dict[str, object]:
@@ -455,6 +678,7 @@ def add_synonym(company_id: str, canon: str, variant: str, confidence: float = 0
                 session.add(synonym)
             session.commit()
             session.refresh(synonym)
+            _bump_version(company_id)
             data = synonym.dict()
             data.pop("id", None)
             return data
@@ -477,6 +701,7 @@ def add_synonym(company_id: str, canon: str, variant: str, confidence: float = 0
             },
         )
         conn.commit()
+        _bump_version(company_id)
         row = conn.execute(
             "SELECT company_id, canon, variant, confidence, updated_at FROM synonyms WHERE company_id=? AND canon=? AND variant=?",
             (company_id, canon_norm, variant_norm),
@@ -484,6 +709,78 @@ def add_synonym(company_id: str, canon: str, variant: str, confidence: float = 0
         return dict(row)
 
 
+_SQL_UPSERT_SYNONYM = """
+    INSERT INTO synonyms(company_id, canon, variant, confidence, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(company_id, canon, variant) DO UPDATE SET
+        confidence = excluded.confidence,
+        updated_at = excluded.updated_at
+"""
+
+
+def add_synonyms_bulk(
+    company_id: str,
+    pairs: Iterable[Tuple[str, str]],
+    confidence: float = 0.9,
+) -> int:
+    """Upsert many ``(canon, variant)`` pairs in one transaction and return the count."""
+
+    normalized: List[Tuple[str, str]] = []
+    for canon, variant in pairs:
+        canon_norm = canon.strip()
+        variant_norm = variant.strip()
+        if not canon_norm or not variant_norm:
+            raise ValueError("Canon and variant must be non-empty.")
+        normalized.append((canon_norm, variant_norm))
+    # Each pair is written and counted once, however often the input repeats it.
+    normalized = list(dict.fromkeys(normalized))
+    if not normalized:
+        return 0
+
+    timestamp = datetime.utcnow()
+    if _HAS_SQLMODEL:
+        engine = _get_engine()
+        if engine.dialect.name in ("sqlite", "postgresql"):
+            if engine.dialect.name == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            stmt = dialect_insert(Synonym.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["company_id", "canon", "variant"],
+                set_={"confidence": stmt.excluded.confidence, "updated_at": stmt.excluded.updated_at},
+            )
+            rows = [
+                {
+                    "company_id": company_id,
+                    "canon": canon_norm,
+                    "variant": variant_norm,
+                    "confidence": confidence,
+                    "updated_at": timestamp,
+                }
+                for canon_norm, variant_norm in normalized
+            ]
+            # A parameter list runs as executemany, one row per statement, so a
+            # large import never hits the database's bound-variable limit.
+            with engine.begin() as conn:
+                conn.execute(stmt, rows)
+        else:
+            for canon_norm, variant_norm in normalized:
+                add_synonym(company_id, canon_norm, variant_norm, confidence)
+        _bump_version(company_id)
+        return len(normalized)
+
+    updated = timestamp.isoformat()
+    with _sqlite_conn() as conn:
+        conn.executemany(
+            _SQL_UPSERT_SYNONYM,
+            ((company_id, canon_norm, variant_norm, confidence, updated) for canon_norm, variant_norm in normalized),
+        )
+        conn.commit()
+    _bump_version(company_id)
+    return len(normalized)
+
+
 def clear_synonyms(company_id: str) -> int:
     if _HAS_SQLMODEL:
         with _session() as session:
@@ -493,13 +790,71 @@ def clear_synonyms(company_id: str) -> int:
             for synonym in synonyms:
                 session.delete(synonym)
             session.commit()
+            _bump_version(company_id)
             return count
     with _sqlite_conn() as conn:
         cur = conn.execute("DELETE FROM synonyms WHERE company_id=?", (company_id,))
         conn.commit()
+        _bump_version(company_id)
         return cur.rowcount or 0
 
 
+def truncate_all() -> None:
+    """Delete all products and synonyms in a single transaction (used for test isolation)."""
+
+    init_db()
+    if _HAS_SQLMODEL:
+        with _session() as session:
+            session.execute(Synonym.__table__.delete())
+            session.execute(Product.__table__.delete())
+            session.commit()
+    else:
+        with _sqlite_conn() as conn:
+            conn.execute("DELETE FROM synonyms")
+            conn.execute("DELETE FROM products")
+            conn.commit()
+        # Commits on this thread's own connection leave data_version unchanged.
+        _TLS.read_cache = {}
+
+
+def reset_state(db_url: Optional[str] = None) -> None:
+    """Point the store at ``db_url`` (default: the environment) and recreate empty tables.
+
+    Test helper that replaces re-importing the module: the SQLModel metadata is
+    built once per process, only engine, connections and caches start over.
+    """
+
+    global DB_URL, _DB_PATH, _MEM_ANCHOR, _engine, _engine_url, _HAS_IS_DELETED
+    if _HAS_SQLMODEL:
+        if _engine is not None:
+            _engine.dispose()
+    else:
+        cached = getattr(_TLS, "sqlite_conn", None)
+        if cached is not None:
+            cached[1].close()
+            _TLS.sqlite_conn = None
+        if _MEM_ANCHOR is not None:
+            _MEM_ANCHOR.close()
+
+    DB_URL = db_url or _configured_db_url()
+    _DB_PATH = _ensure_sqlite_dir(DB_URL)
+    _MEM_ANCHOR = None
+    _engine = None
+    _engine_url = None
+    _HAS_IS_DELETED = None
+    _INITIALIZED.clear()
+    _WRITE_VERSION.clear()
+
+    if _HAS_SQLMODEL:
+        SQLModel.metadata.drop_all(_get_engine())
+    else:
+        with _sqlite_conn() as conn:
+            conn.execute("DROP TABLE IF EXISTS synonyms")
+            conn.execute("DROP TABLE IF EXISTS products")
+            conn.commit()
+    init_db()
+
+
 def insert_synonym(company_id: str, canon: str, variant: str, confidence: float = 0.9) -> Dict[str, object]:
     """Compatibility alias for add_synonym."""
 
@@ -508,7 +863,9 @@ def insert_synonym(company_id: str, canon: str, variant: str, confidence: float
 
 def _normalize_product_row(data: Dict[str, object]) -> Dict[str, object]:
     if "is_active" in data:
-        data["is_active"] = bool(data["is_active"])
+        value = data["is_active"]
+        if value is not True and value is not False:
+            data["is_active"] = bool(value)
     return data
 
 
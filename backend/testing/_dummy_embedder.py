@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+
+class DummyEmbedder:
+    """Deterministic one-dimensional embedder (text length) with the SentenceTransformer contract."""
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        lengths = np.fromiter((len(text) or 1 for text in texts), dtype=np.float32, count=len(texts))
+        return lengths.reshape(-1, 1)
+
+
+DUMMY_EMBEDDER = DummyEmbedder()
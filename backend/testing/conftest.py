@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+# Named shared-cache in-memory database; on-disk behaviour stays covered by test_store.py.
+TEST_DB_URL = "sqlite:///file:kalkulai_test?mode=memory&cache=shared&uri=true"
+
+
+@pytest.fixture(scope="session")
+def app_factory():
+    """Import ``backend.main`` once per session against an in-memory catalog database."""
+
+    # numpy is only needed here; the smoke job runs without it.
+    from _dummy_embedder import DUMMY_EMBEDDER
+
+    db_url = TEST_DB_URL
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("KALKULAI_DB_URL", db_url)
+        mp.setenv("SKIP_LLM_SETUP", "1")
+        main = importlib.import_module("backend.main")
+
+        # main and the routers share the top-level ``store``/``retriever`` modules;
+        # repoint the store if it was imported earlier with another URL.
+        store = main.catalog_store
+        if store.DB_URL != db_url:
+            store.reset_state(db_url)
+        store.init_db()
+        if store._HAS_SQLMODEL:
+            # All sessions must share the single in-memory connection.
+            from sqlalchemy.pool import StaticPool
+
+            assert isinstance(store._get_engine().pool, StaticPool)
+
+        index_manager = main.admin_api.index_manager
+        index_manager.reset_state(embedder=DUMMY_EMBEDDER)
+        yield main
+
+
+@pytest.fixture(scope="session")
+def reset_app_db(app_factory):
+    """Return a callable that empties the app's catalog database and caches."""
+
+    def _reset():
+        store = app_factory.catalog_store
+        if store.DB_URL == TEST_DB_URL:
+            store.truncate_all()
+        else:
+            # Store/retriever tests point the shared module at their own database.
+            store.reset_state(TEST_DB_URL)
+        app_factory.admin_api.index_manager.reset_state()
+        # main snapshots the catalog at import time, possibly from another test's database.
+        app_factory.refresh_catalog_cache(force=True)
+        return app_factory
+
+    return _reset
+
+
+@pytest.fixture
+def db_reset(reset_app_db):
+    """Empty the catalog tables and the index cache instead of reloading modules."""
+
+    yield reset_app_db()
+
+
+@pytest.fixture
+def client(db_reset):
+    return TestClient(db_reset.app)
+
+
+# Stand-in for app.pdf (WeasyPrint); one module object reused by every PDF test.
+_FAKE_PDF = types.ModuleType("backend.app.pdf")
+_FAKE_PDF.DEFAULT_OFFER_TEMPLATE_ID = "classic"
+_FAKE_PDF.resolve_offer_template = lambda tpl_id: {"id": "classic", "file": "offer.html"}
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+    """Register the fake PDF module and return ``set_render(fn)`` for its renderer.
+
+    quote_service imports the module as ``app.pdf``, so both names are patched.
+    """
+
+    for name in ("app.pdf", "backend.app.pdf"):
+        monkeypatch.setitem(sys.modules, name, _FAKE_PDF)
+
+    def set_render(fn):
+        monkeypatch.setattr(_FAKE_PDF, "render_pdf_from_template", fn, raising=False)
+        return _FAKE_PDF
+
+    return set_render
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def aclient(db_reset):
+    """In-process async client; lets a test issue independent requests concurrently."""
+
+    transport = httpx.ASGITransport(app=db_reset.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
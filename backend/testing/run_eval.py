@@ -1,17 +1,21 @@
-import json, re, statistics
+import json, math, re
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 
 MODEL = "gpt-4o-mini"
 SYSTEM_PROMPT = open("testing/llm1_system_v1_1.md", "r", encoding="utf-8").read()
+# Prompt einmalig an den Platzhaltern zerlegen statt pro Aufruf zweimal zu ersetzen
+_HEAD, _REST = SYSTEM_PROMPT.split("{{chat_history}}", 1)
+_MID, _TAIL = _REST.split("{{human_input}}", 1)
 
 client = OpenAI()  # setzt OPENAI_API_KEY aus der Umgebung
 
 A = dict(temperature=0.1, top_p=0.9, seed=42, max_output_tokens=1000)
 B = dict(temperature=0.3, top_p=0.9, seed=42, max_output_tokens=1000)
+MAX_WORKERS = 8  # parallele API-Requests
 
 def call_llm(params, chat_history, human_input):
-    dev = SYSTEM_PROMPT.replace("{{chat_history}}", chat_history)\
-                       .replace("{{human_input}}", human_input)
+    dev = f"{_HEAD}{chat_history}{_MID}{human_input}{_TAIL}"
     resp = client.chat.completions.create(
         model=MODEL,
         messages=[{"role": "developer", "content": dev}],
@@ -23,17 +27,20 @@ def call_llm(params, chat_history, human_input):
 RE_STATUS = re.compile(r"status:\s*(schätzung|bestätigt)\b", re.I)
 RE_ITEM   = re.compile(r"- name=.+?, menge=\d+(\.\d+)?, einheit=(kg|L|m²|m|Stück|Platte)")
 FORBIDDEN = re.compile(r"\b(Eimer|Sack|Gebinde|VE)\b", re.I)
+GUARD_TEXT = "Es liegen noch keine Angebotsdaten vor."
+HEADERS = ("**Projektbeschreibung**", "**Leistungsdaten**", "**Materialbedarf**")
 
 def eval_case(output, expect):
     score = 0
     notes = []
 
-    m = RE_STATUS.search(output or "")
+    output = output or ""
+    m = RE_STATUS.search(output)
     status = (m.group(1).lower() if m else None)
 
     # Mode-Mapping
     if expect["mode"] == "guard":
-        if "Es liegen noch keine Angebotsdaten vor." in output:
+        if GUARD_TEXT in output:
             score += 1
         else:
             notes.append("guard text fehlt")
@@ -41,7 +48,7 @@ def eval_case(output, expect):
         if status == "schätzung": score += 1
         else: notes.append("status != schätzung")
         # Pflicht-Überschriften
-        for h in ["**Projektbeschreibung**", "**Leistungsdaten**", "**Materialbedarf**"]:
+        for h in HEADERS:
             if h in output: score += 0.5
             else: notes.append(f"Header fehlt: {h}")
         # Material-Zeilen vorhanden
@@ -64,30 +71,44 @@ def eval_case(output, expect):
 
     return score, notes
 
-def run_variant(params, cases):
-    results = []
-    for c in cases:
-        out = call_llm(params, c["chat_history"], c["human_input"])
+def run_variants(variants, cases, max_workers=MAX_WORKERS):
+    # Alle (Variante, Fall)-Paare gleichzeitig abfragen, danach offline bewerten
+    tasks = [(label, params, c) for label, params in variants for c in cases]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        outputs = list(pool.map(lambda t: call_llm(t[1], t[2]["chat_history"], t[2]["human_input"]), tasks))
+    results = {label: [] for label, _ in variants}
+    for (label, _, c), out in zip(tasks, outputs):
         score, notes = eval_case(out, c["expect"])
-        results.append({"name": c["name"], "score": score, "notes": notes, "output": out})
+        results[label].append({"name": c["name"], "score": score, "notes": notes, "output": out})
     return results
 
+def run_variant(params, cases):
+    return run_variants([("variant", params)], cases)["variant"]
+
 if __name__ == "__main__":
     cases = json.load(open("eval_cases.json", "r", encoding="utf-8"))
 
-    resA = run_variant(A, cases)
-    resB = run_variant(B, cases)
+    res = run_variants([("A", A), ("B", B)], cases)
+    resA, resB = res["A"], res["B"]
 
     def summarize(res, label):
-        scores = [r["score"] for r in res]
-        print(f"\n=== {label} ===")
-        print(f"Mean score: {statistics.mean(scores):.2f} | Min: {min(scores):.2f} | Max: {max(scores):.2f}")
+        # Summe/Min/Max in einem Durchlauf, ohne Zwischenliste der Scores
+        total, lo, hi = 0.0, math.inf, -math.inf
+        lines = []
         for r in res:
-            print(f"- {r['name']}: {r['score']:.2f}  {'; '.join(r['notes']) if r['notes'] else 'OK'}")
-        return scores
+            score = r["score"]
+            total += score
+            lo = min(lo, score)
+            hi = max(hi, score)
+            lines.append(f"- {r['name']}: {score:.2f}  {'; '.join(r['notes']) if r['notes'] else 'OK'}")
+        mean = total / len(res) if res else 0.0
+        print(f"\n=== {label} ===")
+        print(f"Mean score: {mean:.2f} | Min: {lo:.2f} | Max: {hi:.2f}")
+        print("\n".join(lines))
+        return mean
 
-    sA = summarize(resA, "Variant A (temp=0.1)")
-    sB = summarize(resB, "Variant B (temp=0.3)")
+    mA = summarize(resA, "Variant A (temp=0.1)")
+    mB = summarize(resB, "Variant B (temp=0.3)")
 
-    delta = statistics.mean(sA) - statistics.mean(sB)
+    delta = mA - mB
     print(f"\nΔ(A-B) = {delta:.2f}  → {'A besser' if delta>0 else 'B besser' if delta<0 else 'gleich'}")
@@ -1,46 +1,44 @@
 import csv
-import importlib
 import json
 from pathlib import Path
 
 import pytest
 
+from _dummy_embedder import DUMMY_EMBEDDER
+from backend.cli import catalog_cli as cli
+from backend.retriever import index_manager
+from backend.store import catalog_store
+
 try:
     import yaml  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover - optional dependency
     yaml = None
 
+_Loader = getattr(yaml, "CSafeLoader", None) or getattr(yaml, "SafeLoader", None)
 
-def _reload_modules(monkeypatch):
-    monkeypatch.setenv("KALKULAI_DB_URL", "sqlite:///:memory:")
-    store_module = importlib.import_module("backend.store.catalog_store")
-    index_module = importlib.import_module("backend.retriever.index_manager")
-    cli_module = importlib.import_module("backend.cli.catalog_cli")
 
-    store = importlib.reload(store_module)
-    store.init_db()
-    index_manager = importlib.reload(index_module)
+def _reset_modules():
+    # The CLI writes through ``backend.store`` while index_manager reads the top-level
+    # ``store`` package; point both at the same fresh in-memory database.
+    for store in (catalog_store, index_manager.catalog_store):
+        store.reset_state("sqlite:///:memory:")
+    index_manager.reset_state(embedder=DUMMY_EMBEDDER)
+    return catalog_store, index_manager, cli
 
-    class DummyEmbedder:
-        def encode(self, texts):
-            return [[float(len(text) or 1.0)] for text in texts]
 
-    index_manager._EMBEDDER = DummyEmbedder()
-    cli = importlib.reload(cli_module)
-    cli.index_manager._EMBEDDER = DummyEmbedder()
-    return store, index_manager, cli
+_CSV_FIELDS = ("sku", "name", "description", "unit", "volume_l", "price_eur", "active")
 
 
 def _write_csv(path: Path, rows):
+    records = [tuple(row.get(field, "") for field in _CSV_FIELDS) for row in rows]
     with path.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(handle, fieldnames=["sku", "name", "description", "unit", "volume_l", "price_eur", "active"])
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+        writer = csv.writer(handle)
+        writer.writerow(_CSV_FIELDS)
+        writer.writerows(records)
 
 
-def test_import_export_products_roundtrip_csv(tmp_path, monkeypatch):
-    store, index_manager, cli = _reload_modules(monkeypatch)
+def test_import_export_products_roundtrip_csv(tmp_path):
+    store, index_manager, cli = _reset_modules()
     csv_path = tmp_path / "acme.csv"
     _write_csv(
         csv_path,
@@ -99,8 +97,8 @@ def test_import_export_products_roundtrip_csv(tmp_path, monkeypatch):
 
 
 @pytest.mark.skipif(yaml is None, reason="PyYAML is required")
-def test_import_export_synonyms_yaml(tmp_path, monkeypatch):
-    store, _, cli = _reload_modules(monkeypatch)
+def test_import_export_synonyms_yaml(tmp_path):
+    store, _, cli = _reset_modules()
     yaml_path = tmp_path / "synonyms.yaml"
     yaml_path.write_text("tiefgrund:\n  - Grundierung Tief\n  - Haftgrundierung\n", encoding="utf-8")
 
@@ -131,12 +129,12 @@ def test_import_export_synonyms_yaml(tmp_path, monkeypatch):
         ]
     )
     assert exit_code == 0
-    data = yaml.safe_load(export_path.read_text(encoding="utf-8"))
+    data = yaml.load(export_path.read_text(encoding="utf-8"), Loader=_Loader)
     assert data == {"tiefgrund": ["grundierung tief", "haftgrundierung"]}
 
 
-def test_update_index_partial(tmp_path, monkeypatch):
-    store, index_manager, cli = _reload_modules(monkeypatch)
+def test_update_index_partial(tmp_path):
+    store, index_manager, cli = _reset_modules()
     csv_path = tmp_path / "bulk.csv"
     _write_csv(
         csv_path,
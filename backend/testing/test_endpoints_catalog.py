@@ -1,20 +1,16 @@
 import os
-import sys
-from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Dict, List
 
 os.environ.setdefault("SKIP_LLM_SETUP", "1")
 
-REPO_ROOT = Path(__file__).resolve().parents[2]
-BACKEND_DIR = REPO_ROOT / "backend"
-for path in (REPO_ROOT, BACKEND_DIR):
-    if str(path) not in sys.path:
-        sys.path.insert(0, str(path))
-
 from fastapi.testclient import TestClient
 import pytest
 
 import backend.main as main
 
+pytestmark = pytest.mark.slow
+
 
 class _DummyRetriever:
     def get_relevant_documents(self, query):  # pragma: no cover - helper
@@ -58,57 +54,91 @@ SAMPLE_ITEMS = [
 ]
 
 
-def _reset_catalog(items):
-    main.CATALOG_ITEMS = items
-    main.CATALOG_BY_NAME = {
-        (item["name"] or "").lower(): item for item in items if item.get("name")
-    }
-    main.CATALOG_BY_SKU = {item["sku"]: item for item in items if item.get("sku")}
-    main.CATALOG_TEXT_BY_NAME = {
-        (item["name"] or "").lower(): item.get("raw", "") for item in items if item.get("name")
-    }
-    main.CATALOG_TEXT_BY_SKU = {item["sku"]: item.get("raw", "") for item in items if item.get("sku")}
-    main.CATALOG_SEARCH_CACHE.clear()
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    items: List[Dict[str, Any]]
+    by_name: Dict[str, Dict[str, Any]]
+    by_sku: Dict[str, Dict[str, Any]]
+    text_by_name: Dict[str, str]
+    text_by_sku: Dict[str, str]
+
+    @classmethod
+    def from_items(cls, items: List[Dict[str, Any]]) -> "CatalogSnapshot":
+        named = [item for item in items if item.get("name")]
+        with_sku = [item for item in items if item.get("sku")]
+        return cls(
+            items=list(items),
+            by_name={(item["name"] or "").lower(): item for item in named},
+            by_sku={item["sku"]: item for item in with_sku},
+            text_by_name={(item["name"] or "").lower(): item.get("raw", "") for item in named},
+            text_by_sku={item["sku"]: item.get("raw", "") for item in with_sku},
+        )
+
+
+# Built once at import; tests install it by reference instead of rebuilding the lookups.
+SAMPLE_SNAPSHOT = CatalogSnapshot.from_items(SAMPLE_ITEMS)
+
+
+def _install_catalog(monkeypatch, snapshot: CatalogSnapshot):
+    monkeypatch.setattr(main, "CATALOG_ITEMS", snapshot.items)
+    monkeypatch.setattr(main, "CATALOG_BY_NAME", snapshot.by_name)
+    monkeypatch.setattr(main, "CATALOG_BY_SKU", snapshot.by_sku)
+    monkeypatch.setattr(main, "CATALOG_TEXT_BY_NAME", snapshot.text_by_name)
+    monkeypatch.setattr(main, "CATALOG_TEXT_BY_SKU", snapshot.text_by_sku)
+    # Endpoints read the service context, which holds its own references.
+    ctx = main.SERVICE_CONTEXT
+    monkeypatch.setattr(ctx, "catalog_items", snapshot.items)
+    monkeypatch.setattr(ctx, "catalog_by_name", snapshot.by_name)
+    monkeypatch.setattr(ctx, "catalog_by_sku", snapshot.by_sku)
+    monkeypatch.setattr(ctx, "catalog_text_by_name", snapshot.text_by_name)
+    monkeypatch.setattr(ctx, "catalog_text_by_sku", snapshot.text_by_sku)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _setup_environment():
+    # Catalog and retriever are installed once for the module; only the search cache is per test.
+    with pytest.MonkeyPatch.context() as mp:
+        _install_catalog(mp, SAMPLE_SNAPSHOT)
+        mp.setattr(main, "RETRIEVER", _DummyRetriever())
+        yield
 
 
 @pytest.fixture(autouse=True)
-def _setup_environment():
-    _reset_catalog(list(SAMPLE_ITEMS))
-    main.RETRIEVER = _DummyRetriever()
+def _clear_search_cache():
+    main.CATALOG_SEARCH_CACHE.clear()
     yield
     main.CATALOG_SEARCH_CACHE.clear()
 
 
-@pytest.fixture()
+@pytest.fixture(scope="module")
 def client():
     return TestClient(main.app)
 
 
-def test_catalog_search_200_and_shape(client):
-    resp = client.get("/api/catalog/search", params={"q": "Tiefgrund", "top_k": 5})
-    assert resp.status_code == 200
-    data = resp.json()
-    assert data["count"] <= 5
-    assert data["results"]
-    first = data["results"][0]
-    for key in ("sku", "name", "confidence"):
-        assert key in first
-    assert "took_ms" in data
-
-
-def test_catalog_search_fallback_on_error(client, monkeypatch):
-    def _boom(**kwargs):  # pragma: no cover - injected failure
-        raise RuntimeError("boom")
-
-    monkeypatch.setattr(main, "search_catalog_thin", _boom)
-    resp = client.get("/api/catalog/search", params={"q": "Haftgrund", "top_k": 3})
-    assert resp.status_code == 200
-    data = resp.json()
-    assert data["count"] > 0
-    assert data["results"][0]["name"]
-
-
-def test_catalog_search_logs_timing(client, caplog):
-    caplog.set_level("INFO", logger="kalkulai")
-    client.get("/api/catalog/search", params={"q": "Malerkrepp", "top_k": 2})
-    assert any("catalog.search" in record.getMessage() for record in caplog.records)
+def _boom(**kwargs):  # pragma: no cover - injected failure
+    raise RuntimeError("boom")
+
+
+@pytest.mark.parametrize("scenario", ["ok", "fallback", "logs"])
+def test_catalog_search(client, monkeypatch, caplog, scenario):
+    if scenario == "fallback":
+        monkeypatch.setattr(main, "search_catalog_thin", _boom)
+        resp = client.get("/api/catalog/search", params={"q": "Haftgrund", "top_k": 3})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["count"] > 0
+        assert data["results"][0]["name"]
+    elif scenario == "logs":
+        caplog.set_level("INFO", logger="kalkulai")
+        client.get("/api/catalog/search", params={"q": "Malerkrepp", "top_k": 2})
+        assert any("catalog.search" in record.getMessage() for record in caplog.records)
+    else:
+        resp = client.get("/api/catalog/search", params={"q": "Tiefgrund", "top_k": 5})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["count"] <= 5
+        assert data["results"]
+        first = data["results"][0]
+        for key in ("sku", "name", "confidence"):
+            assert key in first
+        assert "took_ms" in data
@@ -1,36 +1,60 @@
 from __future__ import annotations
 
 import importlib
-import os
-from pathlib import Path
 from types import SimpleNamespace
 
 import pytest
 from fastapi.testclient import TestClient
 
+pytestmark = [pytest.mark.slow, pytest.mark.xdist_group("db")]
 
-def _setup_app(monkeypatch, tmp_path: Path):
-    db_path = tmp_path / "company.db"
-    monkeypatch.setenv("KALKULAI_DB_URL", f"sqlite:///{db_path}")
-    monkeypatch.setenv("SKIP_LLM_SETUP", "1")
-    store = importlib.reload(__import__("backend.store.catalog_store", fromlist=["dummy"]))
-    store.init_db()
-    store.upsert_product("acme", {"sku": "acme-dsp-10l", "name": "Innenfarbe Weiß 10 L", "description": "Acme"})
-    store.upsert_product("beta", {"sku": "beta-tiefgrund-10l", "name": "Tiefengrund 10 L", "description": "Beta"})
 
-    index_manager = importlib.reload(__import__("backend.retriever.index_manager", fromlist=["dummy"]))
+@pytest.fixture(scope="module")
+def company_app(reset_app_db):
+    """Seed both company catalogs and build their indexes once for the module."""
 
-    class DummyEmbedder:
-        def encode(self, texts):
-            return [[float(len(text) or 1.0)] for text in texts]
+    app_factory = reset_app_db()
+    store = app_factory.catalog_store
+    store.upsert_product("acme", {"sku": "acme-dsp-10l", "name": "Innenfarbe Weiß 10 L", "description": "Acme"})
+    store.upsert_product("beta", {"sku": "beta-tiefgrund-10l", "name": "Tiefengrund 10 L", "description": "Beta"})
+    # Default catalog the hybrid search ranks offer terms against.
+    store.upsert_product("demo", {"sku": "std-tiefengrund-lf", "name": "Tiefengrund LF farblos 10 L", "description": "Standard"})
+    app_factory.refresh_catalog_cache(force=True)
 
-    index_manager._EMBEDDER = DummyEmbedder()
-    index_manager._INDEX_CACHE.clear()
+    # Tests here only read the catalog; one that mutates products should call
+    # index_manager.update_index(company_id, changed_skus) instead of rebuilding.
+    index_manager = app_factory.admin_api.index_manager
     index_manager.rebuild_index("acme")
     index_manager.rebuild_index("beta")
+    return app_factory
+
+
+# Company seen by the last rank_main call; DummyLLM answers for that company.
+_LAST_COMPANY: dict = {}
+
+
+def fake_rank_main(query, retriever, top_k=5, business_cfg=None, company_id=None):
+    _LAST_COMPANY["value"] = company_id
+    sku = "beta-tiefgrund-10l" if company_id == "beta" else "acme-dsp-10l"
+    return [{"sku": sku, "name": f"Result {sku}"}]
 
-    main = importlib.reload(__import__("backend.main", fromlist=["app"]))
 
+@pytest.fixture(scope="module")
+def _stub_rank(company_app):
+    """Install the rank_main stub once for the whole module."""
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(importlib.import_module("backend.retriever.main"), "rank_main", fake_rank_main)
+        mp.setattr(company_app, "rank_main", fake_rank_main, raising=False)
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _reset_last_company(_stub_rank):
+    _LAST_COMPANY.clear()
+
+
+def _setup_app(monkeypatch, main):
     class StubRetriever:
         class Doc:
             def __init__(self, text):
@@ -40,45 +64,34 @@ def _setup_app(monkeypatch, tmp_path: Path):
         def get_relevant_documents(self, query):
             return [self.Doc(query)]
 
-    main.RETRIEVER = StubRetriever()
-
-    last_company = {"value": None}
-
-    def fake_rank_main(query, retriever, top_k=5, business_cfg=None, company_id=None):
-        last_company["value"] = company_id
-        sku = "beta-tiefgrund-10l" if company_id == "beta" else "acme-dsp-10l"
-        return [{"sku": sku, "name": f"Result {sku}"}]
-
-    backend_retriever_main = importlib.import_module("backend.retriever.main")
-    backend_retriever_main.rank_main = fake_rank_main
-    main.rank_main = fake_rank_main
-    main._ensure_llm_enabled = lambda *args, **kwargs: None
-    main.chain2 = object()
+    monkeypatch.setattr(main, "RETRIEVER", StubRetriever())
+    monkeypatch.setattr(main, "_ensure_llm_enabled", lambda *args, **kwargs: None)
+    monkeypatch.setattr(main, "chain2", object())
 
     class DummyLLM:
         def invoke(self, formatted):
-            company = last_company["value"] or "acme"
+            company = _LAST_COMPANY.get("value") or "acme"
             sku = "beta-tiefgrund-10l" if company == "beta" else "acme-dsp-10l"
             content = (
                 f'[{{"nr":1,"name":"{sku}","menge":1,"einheit":"stk","sku":"{sku}","epreis":0,"gesamtpreis":0}}]'
             )
             return SimpleNamespace(content=content)
 
-    main.llm2 = DummyLLM()
+    monkeypatch.setattr(main, "llm2", DummyLLM())
 
     class DummyPrompt:
         def format(self, **kwargs):
             return ""
 
-    main.PROMPT2 = DummyPrompt()
-    main.memory1 = SimpleNamespace(load_memory_variables=lambda _: {"chat_history": ""})
-    main.chain1 = SimpleNamespace(run=lambda **kwargs: None)
+    monkeypatch.setattr(main, "PROMPT2", DummyPrompt())
+    monkeypatch.setattr(main, "memory1", SimpleNamespace(load_memory_variables=lambda _: {"chat_history": ""}))
+    monkeypatch.setattr(main, "chain1", SimpleNamespace(run=lambda **kwargs: None))
 
     return TestClient(main.app)
 
 
-def test_company_specific_catalog_search(monkeypatch, tmp_path):
-    client = _setup_app(monkeypatch, tmp_path)
+def test_company_specific_catalog_search(monkeypatch, company_app):
+    client = _setup_app(monkeypatch, company_app)
 
     resp = client.get("/api/catalog/search", params={"q": "Innenfarbe Weiß", "company_id": "acme"})
     assert resp.status_code == 200
@@ -94,8 +107,8 @@ def test_company_specific_catalog_search(monkeypatch, tmp_path):
     assert resp.status_code == 200
 
 
-def test_company_specific_offer(monkeypatch, tmp_path):
-    client = _setup_app(monkeypatch, tmp_path)
+def test_company_specific_offer(monkeypatch, company_app):
+    client = _setup_app(monkeypatch, company_app)
     payload = {"message": "Bitte Angebot", "products": ["Tiefgrund 10 L"]}
     resp = client.post("/api/offer", params={"company_id": "beta"}, json=payload)
     assert resp.status_code == 200
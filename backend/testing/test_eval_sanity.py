@@ -1,25 +1,32 @@
 import os
-import sys
 from pathlib import Path
+from types import MappingProxyType
 
 import pytest
 
 os.environ.setdefault("SKIP_LLM_SETUP", "1")
 
-REPO_ROOT = Path(__file__).resolve().parents[2]
-BACKEND_DIR = REPO_ROOT / "backend"
-for path in (REPO_ROOT, BACKEND_DIR):
-    if str(path) not in sys.path:
-        sys.path.insert(0, str(path))
-
 import backend.eval.eval_thin as eval_thin  # noqa: E402
 import backend.eval.eval_main as eval_main  # noqa: E402
 
+pytestmark = pytest.mark.slow
+
+
+GOLDSET_PATH = Path(__file__).resolve().parents[1] / "eval" / "goldset.sample.yaml"
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def gold_data():
-    sample_path = Path(__file__).resolve().parents[1] / "eval" / "goldset.sample.yaml"
-    return eval_thin.load_goldset(sample_path)
+    # Parsed once per session; frozen so a test mutating it fails loudly.
+    return _freeze(eval_thin.load_goldset(GOLDSET_PATH))
 
 
 def test_eval_thin_run(monkeypatch, gold_data):
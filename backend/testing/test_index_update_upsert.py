@@ -1,19 +1,19 @@
-import importlib
-import os
-from pathlib import Path
+import pytest
 
+from _dummy_embedder import DUMMY_EMBEDDER
 
-def test_update_index_in_place(tmp_path):
-    db_path = tmp_path / "catalog.db"
-    os.environ["KALKULAI_DB_URL"] = f"sqlite:///{db_path}"
+pytestmark = [pytest.mark.slow, pytest.mark.xdist_group("db")]
 
-    store = importlib.reload(__import__("backend.store.catalog_store", fromlist=["dummy"]))
-    store.init_db()
+
+def _modules(main):
+    return main.catalog_store, main.admin_api.index_manager
+
+
+def test_update_index_in_place(db_reset):
+    store, index_manager = _modules(db_reset)
     store.upsert_product("demo", {"sku": "sku_dsp_10", "name": "Dispersionsfarbe weiß"})
     store.upsert_product("demo", {"sku": "sku_tg_10", "name": "Tiefengrund"})
 
-    index_manager = importlib.reload(__import__("backend.retriever.index_manager", fromlist=["dummy"]))
-
     index_manager.rebuild_index("demo")
     assert index_manager.index_stats("demo")["docs"] == 2
 
@@ -38,10 +38,8 @@ def test_update_index_in_place(tmp_path):
     assert names.get("sku_dsp_10") == "Dispersionsfarbe neu"
 
 
-def test_update_index_refreshes_fallback_map(monkeypatch):
-    monkeypatch.setenv("KALKULAI_DB_URL", "sqlite:///:memory:")
-    store = importlib.reload(__import__("backend.store.catalog_store", fromlist=["dummy"]))
-    store.init_db()
+def test_update_index_refreshes_fallback_map(monkeypatch, db_reset):
+    store, index_manager = _modules(db_reset)
     store.upsert_product("acme", {"sku": "sku_dsp_10", "name": "Fassadenfarbe Grau 5L"})
     store.upsert_product(
         "acme",
@@ -51,15 +49,7 @@ def test_update_index_refreshes_fallback_map(monkeypatch):
         },
     )
 
-    index_manager = importlib.reload(__import__("backend.retriever.index_manager", fromlist=["dummy"]))
-
-    class DummyEmbedder:
-        def encode(self, texts):
-            return [[float(len(text) or 1.0)] for text in texts]
-
-    dummy = DummyEmbedder()
-    monkeypatch.setattr(index_manager, "_get_embedder", lambda: dummy)
-    index_manager._EMBEDDER = dummy
+    monkeypatch.setattr(index_manager, "_get_embedder", lambda: DUMMY_EMBEDDER)
     monkeypatch.setattr(index_manager, "_DOCARRAY_AVAILABLE", False, raising=False)
 
     index_manager.rebuild_index("acme")
@@ -76,23 +66,12 @@ def test_update_index_refreshes_fallback_map(monkeypatch):
     assert doc["name"] == "Innenfarbe Premium Weiß 10L"
 
 
-def test_update_index_removes_inactive_products(tmp_path, monkeypatch):
-    db_path = tmp_path / "catalog_remove.db"
-    monkeypatch.setenv("KALKULAI_DB_URL", f"sqlite:///{db_path}")
-    store = importlib.reload(__import__("backend.store.catalog_store", fromlist=["dummy"]))
-    store.init_db()
+def test_update_index_removes_inactive_products(monkeypatch, db_reset):
+    store, index_manager = _modules(db_reset)
     store.upsert_product("acme", {"sku": "sku_dsp_10", "name": "Dispersionsfarbe Innen 10L"})
     store.upsert_product("acme", {"sku": "sku_tg_10", "name": "Tiefgrund 10 L"})
 
-    index_manager = importlib.reload(__import__("backend.retriever.index_manager", fromlist=["dummy"]))
-
-    class DummyEmbedder:
-        def encode(self, texts):
-            return [[float(len(text) or 1.0)] for text in texts]
-
-    dummy = DummyEmbedder()
-    monkeypatch.setattr(index_manager, "_get_embedder", lambda: dummy)
-    index_manager._EMBEDDER = dummy
+    monkeypatch.setattr(index_manager, "_get_embedder", lambda: DUMMY_EMBEDDER)
     monkeypatch.setattr(index_manager, "_DOCARRAY_AVAILABLE", False, raising=False)
 
     index_manager.rebuild_index("acme")
@@ -110,24 +89,13 @@ def test_update_index_removes_inactive_products(tmp_path, monkeypatch):
     assert "sku_tg_10" not in skus_after
 
 
-def test_update_index_reactivates_products(tmp_path, monkeypatch):
-    db_path = tmp_path / "catalog_reactivate.db"
-    monkeypatch.setenv("KALKULAI_DB_URL", f"sqlite:///{db_path}")
-    store = importlib.reload(__import__("backend.store.catalog_store", fromlist=["dummy"]))
-    store.init_db()
+def test_update_index_reactivates_products(monkeypatch, db_reset):
+    store, index_manager = _modules(db_reset)
     store.upsert_product("acme", {"sku": "sku_dsp_10", "name": "Dispersionsfarbe Weiß 10L"})
     store.upsert_product("acme", {"sku": "sku_dsp_10_weiss", "name": "Innenfarbe Premium Weiß 10L"})
     store.upsert_product("acme", {"sku": "sku_tg_10", "name": "Tiefgrund Spezial 10 L"})
 
-    index_manager = importlib.reload(__import__("backend.retriever.index_manager", fromlist=["dummy"]))
-
-    class DummyEmbedder:
-        def encode(self, texts):
-            return [[float(len(text) or 1.0)] for text in texts]
-
-    dummy = DummyEmbedder()
-    monkeypatch.setattr(index_manager, "_get_embedder", lambda: dummy)
-    index_manager._EMBEDDER = dummy
+    monkeypatch.setattr(index_manager, "_get_embedder", lambda: DUMMY_EMBEDDER)
     monkeypatch.setattr(index_manager, "_DOCARRAY_AVAILABLE", False, raising=False)
 
     index_manager.rebuild_index("acme")
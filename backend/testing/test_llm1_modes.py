@@ -1,19 +1,13 @@
 import os
-import sys
-from pathlib import Path
 
 import pytest
 
 os.environ.setdefault("SKIP_LLM_SETUP", "1")
 
-REPO_ROOT = Path(__file__).resolve().parents[2]
-BACKEND_DIR = REPO_ROOT / "backend"
-for path in (REPO_ROOT, BACKEND_DIR):
-    if str(path) not in sys.path:
-        sys.path.insert(0, str(path))
-
 import backend.main as main  # noqa: E402
 
+pytestmark = pytest.mark.slow
+
 
 def _sample_items():
     return [{"name": "Tiefgrund", "einheit": "L"}]
@@ -45,57 +39,30 @@ def _enable_thin(monkeypatch):
     yield
 
 
-def _patch_search(monkeypatch, hits):
-    def _fake_search(**kwargs):  # pragma: no cover - helper shim
-        return hits
+# mode, top hit score, hard filters passed, ADOPT_THRESHOLD override, expected adoptable, expected auto-selected SKU
+CASES = [
+    ("assistive", 0.9, True, None, False, None),
+    ("strict", 0.9, True, None, True, None),
+    ("merge", 0.93, True, 0.82, True, "SKU-1"),
+    ("merge", 0.8, True, 0.82, False, None),
+    ("strict", 0.95, False, None, False, None),
+]
 
-    monkeypatch.setattr(main, "search_catalog_thin", _fake_search)
 
+@pytest.mark.parametrize("mode, score, hard_filters, threshold, adoptable, selected_sku", CASES)
+def test_llm1_mode_candidates(monkeypatch, mode, score, hard_filters, threshold, adoptable, selected_sku):
+    hits = [_hit(score, hard_filters=hard_filters)]
+    overrides = {"LLM1_MODE": mode, "search_catalog_thin": lambda **kwargs: hits}
+    if threshold is not None:
+        overrides["ADOPT_THRESHOLD"] = threshold
+    for name, value in overrides.items():
+        monkeypatch.setattr(main, name, value)
 
-def test_assistive_shows_candidates_only(monkeypatch):
-    _patch_search(monkeypatch, [_hit(0.9)])
-    monkeypatch.setattr(main, "LLM1_MODE", "assistive")
     candidates = main._build_catalog_candidates(_sample_items())
     assert candidates
     cand = candidates[0]
-    assert cand["adoptable"] is False
-    assert cand["selected_catalog_item_id"] is None
-
-
-def test_strict_marks_adoptable_when_title_contains_canonical(monkeypatch):
-    _patch_search(monkeypatch, [_hit(0.9)])
-    monkeypatch.setattr(main, "LLM1_MODE", "strict")
-    candidates = main._build_catalog_candidates(_sample_items())
-    cand = candidates[0]
-    assert cand["adoptable"] is True
-    assert cand["selected_catalog_item_id"] is None
-
-
-def test_merge_autoselects_when_above_threshold(monkeypatch):
-    _patch_search(monkeypatch, [_hit(0.93)])
-    monkeypatch.setattr(main, "LLM1_MODE", "merge")
-    monkeypatch.setattr(main, "ADOPT_THRESHOLD", 0.82)
-    candidates = main._build_catalog_candidates(_sample_items())
-    cand = candidates[0]
-    assert cand["selected_catalog_item_id"] == "SKU-1"
-    assert cand["selection_reason"] == "rule"
-    assert cand["adoptable"] is True
-    assert cand["unit"] == "L"
-
-
-def test_merge_does_not_autoselect_below_threshold(monkeypatch):
-    _patch_search(monkeypatch, [_hit(0.8)])
-    monkeypatch.setattr(main, "LLM1_MODE", "merge")
-    monkeypatch.setattr(main, "ADOPT_THRESHOLD", 0.82)
-    candidates = main._build_catalog_candidates(_sample_items())
-    cand = candidates[0]
-    assert cand["selected_catalog_item_id"] is None
-    assert cand["adoptable"] is False
-
-
-def test_strict_requires_hard_filters_passed(monkeypatch):
-    _patch_search(monkeypatch, [_hit(0.95, hard_filters=False)])
-    monkeypatch.setattr(main, "LLM1_MODE", "strict")
-    candidates = main._build_catalog_candidates(_sample_items())
-    cand = candidates[0]
-    assert cand["adoptable"] is False
+    assert cand["adoptable"] is adoptable
+    assert cand["selected_catalog_item_id"] == selected_sku
+    if selected_sku is not None:
+        assert cand["selection_reason"] == "rule"
+        assert cand["unit"] == "L"
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import logging
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import pytest
@@ -11,43 +10,60 @@ from backend.app.mcp import tools as mcp_tools
 from backend.app.services.quote_service import QuoteServiceContext
 
 
-@pytest.fixture
-def configured_context(tmp_path: Path) -> QuoteServiceContext:
-    ctx = QuoteServiceContext(
-        chain1=None,
-        chain2=None,
-        llm1=None,
-        llm2=None,
-        prompt2=None,
-        memory1=None,
-        retriever=None,
-        reset_callback=lambda: None,
-        documents=[],
-        catalog_items=[],
-        catalog_by_name={},
-        catalog_by_sku={},
-        catalog_text_by_name={},
-        catalog_text_by_sku={},
-        catalog_search_cache={},
-        wizard_sessions={},
-        env=Environment(),
+# Shared by every context in this module. No test loads templates, so skip the
+# template cache and the auto-reload stat() checks.
+_ENV = Environment(auto_reload=False, cache_size=0)
+_LOGGER = logging.getLogger("test-mcp-tools")
+
+# Context settings shared by the module's tests; only the paths vary.
+_BASE_KWARGS = dict(
+    chain1=None,
+    chain2=None,
+    llm1=None,
+    llm2=None,
+    prompt2=None,
+    memory1=None,
+    retriever=None,
+    reset_callback=lambda: None,
+    documents=[],
+    catalog_items=[],
+    catalog_by_name={},
+    catalog_by_sku={},
+    catalog_text_by_name={},
+    catalog_text_by_sku={},
+    catalog_search_cache={},
+    wizard_sessions={},
+    env=_ENV,
+    vat_rate=0.19,
+    logger=_LOGGER,
+    llm1_mode="assistive",
+    adopt_threshold=0.8,
+    business_scoring=[],
+    llm1_thin_retrieval=False,
+    catalog_top_k=5,
+    catalog_cache_ttl=60,
+    catalog_queries_per_turn=2,
+    skip_llm_setup=True,
+    default_company_id="default",
+    debug=True,
+)
+
+
+@pytest.fixture(scope="module")
+def _service_context(tmp_path_factory) -> QuoteServiceContext:
+    tmp_path = tmp_path_factory.mktemp("mcp-tools")
+    return QuoteServiceContext(
+        **_BASE_KWARGS,
         output_dir=tmp_path,
-        vat_rate=0.19,
         synonyms_path=tmp_path / "synonyms.yaml",
-        logger=logging.getLogger("test-mcp-tools"),
-        llm1_mode="assistive",
-        adopt_threshold=0.8,
-        business_scoring=[],
-        llm1_thin_retrieval=False,
-        catalog_top_k=5,
-        catalog_cache_ttl=60,
-        catalog_queries_per_turn=2,
-        skip_llm_setup=True,
-        default_company_id="default",
-        debug=True,
     )
-    mcp_tools.configure_tools(ctx)
-    return ctx
+
+
+@pytest.fixture
+def configured_context(_service_context) -> QuoteServiceContext:
+    # configure_tools() also clears the company lock and the readiness flag.
+    mcp_tools.configure_tools(_service_context)
+    return _service_context
 
 
 def test_reset_session_tool_calls_service(monkeypatch, configured_context):
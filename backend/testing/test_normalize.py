@@ -1,10 +1,6 @@
 from pathlib import Path
-import sys
 
-BACKEND_ROOT = Path(__file__).resolve().parents[1]
-REPO_ROOT = BACKEND_ROOT.parent
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
+import pytest
 
 from backend.shared.normalize.text import (
     apply_synonyms,
@@ -15,7 +11,12 @@ from backend.shared.normalize.text import (
 )
 
 
-SYN_PATH = BACKEND_ROOT / "shared" / "normalize" / "synonyms.yaml"
+SYN_PATH = Path(__file__).resolve().parents[1] / "shared" / "normalize" / "synonyms.yaml"
+
+
+@pytest.fixture(scope="session")
+def synonyms():
+    return load_synonyms(str(SYN_PATH))
 
 
 def test_umlaut_and_sz_normalization() -> None:
@@ -38,21 +39,18 @@ def test_decompound_simple() -> None:
     assert "grund" in parts_tief
 
 
-def test_synonym_loading_and_application() -> None:
-    synonyms = load_synonyms(str(SYN_PATH))
+def test_synonym_loading_and_application(synonyms) -> None:
     tokens = apply_synonyms({"tiefgrund"}, synonyms)
     assert "haftgrund" in tokens
 
 
-def test_token_pipeline_integration() -> None:
-    synonyms = load_synonyms(str(SYN_PATH))
+def test_token_pipeline_integration(synonyms) -> None:
     tokens = tokenize("Bitte einmal Tiefgrund liefern")
     enriched = apply_synonyms(tokens, synonyms)
     assert "haftgrund" in enriched
 
 
-def test_compound_with_space_maps_to_compound() -> None:
-    synonyms = load_synonyms(str(SYN_PATH))
+def test_compound_with_space_maps_to_compound(synonyms) -> None:
     tokens = tokenize("abdeck band")
     enriched = apply_synonyms(tokens, synonyms)
     assert "abdeckband" in enriched or "abklebeband" in enriched
@@ -1,49 +1,57 @@
+import contextlib
 import os
-import sys
-from pathlib import Path
 
 import pytest
 
 os.environ.setdefault("SKIP_LLM_SETUP", "1")
 
-REPO_ROOT = Path(__file__).resolve().parents[2]
-BACKEND_DIR = REPO_ROOT / "backend"
-for path in (REPO_ROOT, BACKEND_DIR):
-    if str(path) not in sys.path:
-        sys.path.insert(0, str(path))
-
 from app.uom_convert import harmonize_material_line  # noqa: E402
 import backend.main as main  # noqa: E402
 
+pytestmark = pytest.mark.slow
+
+_MISSING = object()
+
+
+@contextlib.contextmanager
+def _swap(mod, name, value):
+    """Bind ``mod.name`` to ``value`` for the duration of the block."""
+
+    old = getattr(mod, name, _MISSING)
+    setattr(mod, name, value)
+    try:
+        yield
+    finally:
+        if old is _MISSING:
+            delattr(mod, name)
+        else:
+            setattr(mod, name, old)
+
 
 def _apply_offer_postprocess(positions):
     business_cfg = {"availability": {}, "price": {}, "margin": {}, "brand_boost": {}}
-    if main.RETRIEVER is not None:
-        for pos in positions:
-            if pos.get("matched_sku"):
-                continue
-            query_name = pos.get("name") or ""
-            if not query_name:
-                continue
-            ranked = main.rank_main(query_name, main.RETRIEVER, top_k=5, business_cfg=business_cfg)
-            if not ranked:
-                continue
-            top = ranked[0]
-            if top.get("sku"):
-                pos["matched_sku"] = top["sku"]
-            if top.get("name"):
-                pos["name"] = top["name"]
-            pos.setdefault("reasons", []).append("rank_main_top1")
-
+    retriever = main.RETRIEVER
     harmonized = []
+    # Single pass: rank_main fallback (only with a retriever) followed by unit harmonization.
     for pos in positions:
+        query_name = pos.get("name") or ""
+        if retriever is not None and query_name and not pos.get("matched_sku"):
+            ranked = main.rank_main(query_name, retriever, top_k=5, business_cfg=business_cfg)
+            if ranked:
+                top = ranked[0]
+                if top.get("sku"):
+                    pos["matched_sku"] = top["sku"]
+                if top.get("name"):
+                    pos["name"] = top["name"]
+                pos.setdefault("reasons", []).append("rank_main_top1")
+
         pos2, reasons, _ = harmonize_material_line(pos)
         if reasons:
             pos2.setdefault("reasons", []).extend(reasons)
         try:
             menge_val = float(pos2.get("menge", 0))
-            pos2["menge"] = int(menge_val) if menge_val.is_integer() else round(menge_val, 3)
-        except (TypeError, ValueError):
+            pos2["menge"] = int(menge_val) if menge_val == int(menge_val) else round(menge_val, 3)
+        except (TypeError, ValueError, OverflowError):
             pass
         harmonized.append(pos2)
     return harmonized
@@ -76,25 +84,23 @@ def test_harmonize_primer_single_pack():
     assert conversion and conversion["factor"] == pytest.approx(10.0)
 
 
-def test_rank_main_fallback_assigns_sku(monkeypatch):
-    main.RETRIEVER = object()
-
-    def _fake_rank(name, retriever, top_k=5, business_cfg=None):
-        return [
-            {
-                "sku": "SKU123",
-                "name": "Haftgrund Innen 10 L",
-                "unit": "L",
-            }
-        ]
+def _fake_rank(name, retriever, top_k=5, business_cfg=None):
+    return [
+        {
+            "sku": "SKU123",
+            "name": "Haftgrund Innen 10 L",
+            "unit": "L",
+        }
+    ]
 
-    monkeypatch.setattr(main, "rank_main", _fake_rank, raising=False)
 
+def test_rank_main_fallback_assigns_sku():
     positions = [
         {"name": "Haftgrund", "menge": 1, "einheit": "Eimer", "epreis": 0.0, "gesamtpreis": 0.0},
     ]
 
-    processed = _apply_offer_postprocess(positions)
+    with _swap(main, "RETRIEVER", object()), _swap(main, "rank_main", _fake_rank):
+        processed = _apply_offer_postprocess(positions)
     assert processed[0]["matched_sku"] == "SKU123"
     assert processed[0]["name"] == "Haftgrund Innen 10 L"
     assert processed[0]["einheit"] == "L"
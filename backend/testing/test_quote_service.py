@@ -1,16 +1,16 @@
 from __future__ import annotations
 
+import dataclasses
 import json
 import logging
-import sys
+import os
 from pathlib import Path
 from types import SimpleNamespace
-from typing import Any, Dict, List
+from typing import Any, Dict, Final, List
 
 import pytest
 from jinja2 import Environment
 
-import backend.app.services.quote_service as qs
 import backend.app.services.quote_service as qs
 from backend.app.services.quote_service import (
     QuoteServiceContext,
@@ -23,9 +23,23 @@ from backend.app.services.quote_service import (
     wizard_finalize,
     wizard_next_step,
 )
+from store import catalog_store
+
+# No test adds globals and app.pdf (which registers filters) is faked, so one
+# Environment serves every context.
+_SHARED_ENV = Environment()
+_SYNONYMS_PATH = Path(__file__).resolve().parents[1] / "shared" / "normalize" / "synonyms.yaml"
+# The service only checks that documents are loaded; shared, do not mutate.
+_DEFAULT_DOCS = [object()]
+
+# Contexts run with debug=True; keep their log records quiet unless QS_TEST_LOG=1.
+_TEST_LOGGER = logging.getLogger("test-quote-service")
+_TEST_LOGGER.disabled = os.getenv("QS_TEST_LOG") != "1"
 
 
 class FakeChain:
+    __slots__ = ("reply", "run_calls")
+
     def __init__(self, reply: str):
         self.reply = reply
         self.run_calls: list[str] = []
@@ -36,33 +50,44 @@ class FakeChain:
 
 
 class FakeChatMemory:
+    __slots__ = ("messages", "_owner")
+
     def __init__(self, owner: "FakeMemory"):
         self.messages: list[str] = []
         self._owner = owner
 
     def add_ai_message(self, content: str) -> None:
         self.messages.append(content)
-        prefix = "\n" if self._owner._history else ""
-        self._owner._history += f"{prefix}Assistent:\n{content}"
+        self._owner._history_parts.append(f"Assistent:\n{content}")
 
 
 class FakeMemory:
+    __slots__ = ("_history_parts", "chat_memory")
+
     def __init__(self, history: str = ""):
-        self._history = history
+        # Joined on read, so each turn appends in O(1) instead of copying the transcript.
+        self._history_parts: list[str] = [history] if history else []
         self.chat_memory = FakeChatMemory(self)
 
+    @property
+    def history(self) -> str:
+        return "\n".join(self._history_parts)
+
     def load_memory_variables(self, _: Dict[str, Any]) -> Dict[str, str]:
-        return {"chat_history": self._history}
+        return {"chat_history": self.history}
 
 
 class FakeLLM:
+    __slots__ = ("reply", "invocations")
+
     def __init__(self, response: str):
-        self.response = response
+        # Built once; the service only reads ``.content``.
+        self.reply = SimpleNamespace(content=response)
         self.invocations: list[str] = []
 
     def invoke(self, prompt: str):
         self.invocations.append(prompt)
-        return SimpleNamespace(content=self.response)
+        return self.reply
 
 
 class EmptyRetriever:
@@ -70,6 +95,10 @@ class EmptyRetriever:
         return []
 
 
+# Stateless, so one instance serves every context (and every thread).
+_EMPTY_RETRIEVER = EmptyRetriever()
+
+
 def _default_catalog_entry() -> Dict[str, Any]:
     return {
         "sku": "sku-001",
@@ -144,67 +173,119 @@ def _override_catalog_entries() -> List[Dict[str, Any]]:
     ]
 
 
-def make_context(tmp_path, **overrides) -> QuoteServiceContext:
-    entry = overrides.pop("catalog_entry", _default_catalog_entry())
-    catalog_items = overrides.pop("catalog_items", [entry])
-    catalog_by_name = overrides.pop(
-        "catalog_by_name",
-        {(entry["name"] or "").lower(): entry},
-    )
-    catalog_by_sku = overrides.pop(
-        "catalog_by_sku",
-        {entry["sku"]: entry},
-    )
-    catalog_text_by_name = overrides.pop(
-        "catalog_text_by_name",
-        {(entry["name"] or "").lower(): entry.get("raw", "")},
-    )
-    catalog_text_by_sku = overrides.pop(
-        "catalog_text_by_sku",
-        {entry["sku"]: entry.get("raw", "")},
-    )
-    ctx = QuoteServiceContext(
-        chain1=overrides.pop("chain1", None),
-        chain2=overrides.pop("chain2", None),
-        llm1=overrides.pop("llm1", None),
-        llm2=overrides.pop("llm2", None),
-        prompt2=overrides.pop("prompt2", "{context}\n{question}"),
-        memory1=overrides.pop("memory1", FakeMemory()),
-        retriever=overrides.pop("retriever", EmptyRetriever()),
-        reset_callback=overrides.pop("reset_callback", None),
-        documents=overrides.pop("documents", [object()]),
-        catalog_items=catalog_items,
-        catalog_by_name=catalog_by_name,
-        catalog_by_sku=catalog_by_sku,
-        catalog_text_by_name=catalog_text_by_name,
-        catalog_text_by_sku=catalog_text_by_sku,
-        catalog_search_cache=overrides.pop("catalog_search_cache", {}),
-        wizard_sessions=overrides.pop("wizard_sessions", {}),
-        env=overrides.pop("env", Environment()),
-        output_dir=overrides.pop("output_dir", tmp_path),
-        vat_rate=overrides.pop("vat_rate", 0.19),
-        synonyms_path=overrides.pop(
-            "synonyms_path",
-            Path(__file__).resolve().parents[1] / "shared" / "normalize" / "synonyms.yaml",
-        ),
-        logger=overrides.pop("logger", logging.getLogger("test-quote-service")),
-        llm1_mode=overrides.pop("llm1_mode", "merge"),
-        adopt_threshold=overrides.pop("adopt_threshold", 0.8),
-        business_scoring=overrides.pop("business_scoring", []),
-        llm1_thin_retrieval=overrides.pop("llm1_thin_retrieval", False),
-        catalog_top_k=overrides.pop("catalog_top_k", 5),
-        catalog_cache_ttl=overrides.pop("catalog_cache_ttl", 60),
-        catalog_queries_per_turn=overrides.pop("catalog_queries_per_turn", 2),
-        skip_llm_setup=overrides.pop("skip_llm_setup", False),
-        default_company_id=overrides.pop("default_company_id", "default"),
-        debug=overrides.pop("debug", True),
-    )
-    for key, value in overrides.items():
-        setattr(ctx, key, value)
-    return ctx
+def _build_catalog_indexes(entries) -> Dict[str, Any]:
+    """Return the ``catalog_*`` context fields for ``entries``."""
+
+    by_name: Dict[str, Any] = {}
+    by_sku: Dict[str, Any] = {}
+    text_by_name: Dict[str, str] = {}
+    text_by_sku: Dict[str, str] = {}
+    for entry in entries:
+        name = (entry["name"] or "").lower()
+        sku = entry["sku"]
+        raw = entry.get("raw", "")
+        by_name[name] = entry
+        by_sku[sku] = entry
+        text_by_name[name] = raw
+        text_by_sku[sku] = raw
+    return {
+        "catalog_items": list(entries),
+        "catalog_by_name": by_name,
+        "catalog_by_sku": by_sku,
+        "catalog_text_by_name": text_by_name,
+        "catalog_text_by_sku": text_by_sku,
+    }
+
+
+# Shared defaults; make_context swaps in per-test state via dataclasses.replace.
+_PROTO_CTX = QuoteServiceContext(
+    chain1=None,
+    chain2=None,
+    llm1=None,
+    llm2=None,
+    prompt2="{context}\n{question}",
+    memory1=None,
+    retriever=_EMPTY_RETRIEVER,
+    reset_callback=None,
+    documents=_DEFAULT_DOCS,
+    **_build_catalog_indexes((_default_catalog_entry(),)),
+    catalog_search_cache={},
+    wizard_sessions={},
+    env=_SHARED_ENV,
+    output_dir=Path("."),
+    vat_rate=0.19,
+    synonyms_path=_SYNONYMS_PATH,
+    logger=_TEST_LOGGER,
+    llm1_mode="merge",
+    adopt_threshold=0.8,
+    llm1_thin_retrieval=False,
+    catalog_top_k=5,
+    catalog_cache_ttl=60,
+    catalog_queries_per_turn=2,
+    skip_llm_setup=False,
+    default_company_id="default",
+    debug=True,
+)
+
+
+@pytest.fixture
+def make_context():
+    """Return a factory deriving a ``QuoteServiceContext`` from ``_PROTO_CTX``.
+
+    ``catalog_entry`` replaces the one-entry default catalog; explicit
+    ``catalog_*`` overrides win over it.
+    """
+
+    def _make(tmp_path, **overrides) -> QuoteServiceContext:
+        entry = overrides.pop("catalog_entry", None)
+        changes = _build_catalog_indexes((entry,)) if entry is not None else {}
+        # State the service mutates is fresh for every test.
+        changes.update(
+            memory1=FakeMemory(),
+            catalog_search_cache={},
+            wizard_sessions={},
+            business_scoring=[],
+            output_dir=tmp_path,
+        )
+        changes.update(overrides)
+        return dataclasses.replace(_PROTO_CTX, **changes)
+
+    return _make
+
+
+@pytest.fixture(scope="session")
+def override_catalog() -> Dict[str, Any]:
+    """``catalog_*`` context fields for the override catalog, built once per session.
+
+    Shared across tests; the service only reads these maps.
+    """
 
+    return _build_catalog_indexes(_override_catalog_entries())
 
-def test_chat_turn_sets_ready_flag(tmp_path):
+
+def _chat(ctx: QuoteServiceContext, message: str, reply: str) -> Dict[str, Any]:
+    """Run one chat turn on ``ctx`` with LLM1 answering ``reply``."""
+
+    ctx.chain1 = FakeChain(reply)
+    return chat_turn(message=message, ctx=ctx)
+
+
+def _positions_named(result: Dict[str, Any], fragment: str) -> list[Dict[str, Any]]:
+    """Offer positions whose name contains ``fragment``, in offer order."""
+
+    return [pos for pos in result["positions"] if fragment in pos["name"]]
+
+
+@pytest.fixture(autouse=True)
+def _stub_catalog_store(monkeypatch):
+    """Give company lookups an empty catalog; tests needing data patch over it."""
+
+    # quote_service imports the top-level ``store`` package, not ``backend.store``.
+    monkeypatch.setattr(catalog_store, "get_active_products", lambda company_id: [])
+    monkeypatch.setattr(catalog_store, "list_synonyms", lambda company_id: {})
+
+
+def test_chat_turn_sets_ready_flag(tmp_path, make_context):
     reply = (
         "Gerne!\n---\nstatus: bestätigt\nmaterialien:\n"
         "- name=Dispersionsfarbe, menge=10, einheit=L\n---"
@@ -226,9 +307,6 @@ def test_chat_turn_sets_ready_flag(tmp_path):
         memory1=FakeMemory(),
         llm1_thin_retrieval=False,
         catalog_entry=entry,
-        catalog_items=[entry],
-        catalog_by_name={entry["name"].lower(): entry},
-        catalog_by_sku={entry["sku"]: entry},
     )
     result = chat_turn(message="Bitte Angebot", ctx=ctx)
 
@@ -237,7 +315,7 @@ def test_chat_turn_sets_ready_flag(tmp_path):
     assert ctx.memory1.chat_memory.messages  # type: ignore[union-attr]
 
 
-def test_chat_turn_requests_details_when_no_data(tmp_path):
+def test_chat_turn_requests_details_when_no_data(tmp_path, make_context):
     ctx = make_context(
         tmp_path,
         chain1=FakeChain("Gerne, ich helfe Ihnen weiter."),
@@ -250,116 +328,201 @@ def test_chat_turn_requests_details_when_no_data(tmp_path):
     assert "Passen die Mengen" not in result["reply"]
 
 
-def test_generate_offer_positions_uses_llm2_and_catalog(tmp_path):
-    llm_response = '[{"nr": 1, "name": "Premiumfarbe weiß 10L", "menge": 10, "einheit": "L", "epreis": 5, "gesamtpreis": 50}]'
-    memory = FakeMemory("Assistent:\n---\nstatus: bestätigt\nmaterialien:\n- name=Premiumfarbe weiß 10L, menge=10, einheit=L\n---")
-    ctx = make_context(
-        tmp_path,
-        llm2=FakeLLM(llm_response),
-        prompt2="CTX:{context}\nQ:{question}",
-        memory1=memory,
-        retriever=None,
-    )
-    payload = {"products": ["Premiumfarbe weiß 10L"]}
-
-    result = generate_offer_positions(payload=payload, ctx=ctx, company_id=None)
-
-    assert result["positions"][0]["name"] == "Premiumfarbe weiß 10L"
-    assert result["positions"][0]["gesamtpreis"] == 50
-    assert json.loads(result["raw"]) == result["positions"]
-
+# Chat transcripts reused verbatim by several tests.
+_HISTORY_CONFIRMED_PAINT_10L: Final[str] = (
+    "Assistent:\n---\nstatus: bestätigt\nmaterialien:\n- name=Premiumfarbe weiß 10L, menge=10, einheit=L\n---"
+)
+_REPLY_START_PAINT_FOIL_TAPE: Final[str] = (
+    "Start.\n---\nstatus: schätzung\nmaterialien:\n"
+    "- name=Innenfarbe weiß, menge=4, einheit=L\n"
+    "- name=Abdeckfolie 20 m², menge=18, einheit=m²\n"
+    "- name=Abklebeband 19 mm, menge=25, einheit=m\n---"
+)
+_REPLY_MORE_TAPE_40M: Final[str] = (
+    "Mehr Band.\n---\nstatus: update\nmaterialien:\n"
+    "- name=Kreppband, menge=40, einheit=m\n---"
+)
 
-def test_generate_offer_positions_adjusts_price_for_pack_conversion(tmp_path):
-    llm_response = (
-        '[{"nr": 1, "name": "Premiumfarbe weiß 10L", "menge": 1, '
-        '"einheit": "Eimer", "epreis": 29.9, "gesamtpreis": 29.9}]'
-    )
-    memory = FakeMemory("Assistent:\n---\nstatus: bestätigt\nmaterialien:\n- name=Premiumfarbe weiß 10L, menge=1, einheit=Eimer\n---")
-    ctx = make_context(
-        tmp_path,
-        llm2=FakeLLM(llm_response),
-        prompt2="CTX:{context}\nQ:{question}",
-        memory1=memory,
-        retriever=None,
-    )
-    payload = {"products": ["Premiumfarbe weiß 10L"]}
+# LLM2 replies shared by several tests, serialized once.
+_PAINT_10L_REPLY = (
+    '[{"nr": 1, "name": "Premiumfarbe weiß 10L", "menge": 10, "einheit": "L", "epreis": 5, "gesamtpreis": 50}]'
+)
+_PAINT_AND_TAPE_ROLL_REPLY = json.dumps(
+    [
+        {"nr": 1, "name": "Innenfarbe weiß", "menge": 4, "einheit": "L", "epreis": 10, "gesamtpreis": 40},
+        {
+            "nr": 2,
+            "name": "Abklebeband 19 mm 25 m Rolle",
+            "menge": 1,
+            "einheit": "Rolle",
+            "epreis": 30,
+            "gesamtpreis": 30,
+        },
+    ]
+)
+_PAINT_AND_FOIL_REPLY = json.dumps(
+    [
+        {"nr": 1, "name": "Innenfarbe weiß", "menge": 5, "einheit": "L", "epreis": 12, "gesamtpreis": 60},
+        {"nr": 2, "name": "Abdeckfolie 20 m²", "menge": 18, "einheit": "m²", "epreis": 2, "gesamtpreis": 36},
+    ]
+)
+_TAPE_PIECE_REPLY = json.dumps(
+    [
+        {"nr": 1, "name": "Abklebeband 19 mm, Standard", "menge": 1, "einheit": "Stück", "epreis": 5, "gesamtpreis": 5}
+    ]
+)
+_FOIL_ROLL_REPLY = json.dumps(
+    [
+        {"nr": 1, "name": "Abdeckfolie 20 m²", "menge": 1, "einheit": "Rolle", "epreis": 8, "gesamtpreis": 8},
+    ]
+)
+_PAINT_BUCKET_REPLY = json.dumps(
+    [
+        {"nr": 1, "name": "Innenfarbe weiß 10L Eimer", "menge": 1, "einheit": "Eimer", "epreis": 60, "gesamtpreis": 60},
+    ]
+)
+_ROLLER_PACK_REPLY = json.dumps(
+    [
+        {"nr": 1, "name": "Farbroller 25 cm", "menge": 1, "einheit": "Pack", "epreis": 8, "gesamtpreis": 8},
+    ]
+)
 
-    result = generate_offer_positions(payload=payload, ctx=ctx, company_id=None)
 
-    pos = result["positions"][0]
-    assert pos["einheit"] == "L"
-    assert pos["menge"] == 10
-    assert pytest.approx(pos["epreis"], rel=1e-6) == 2.99
-    assert pytest.approx(pos["gesamtpreis"], rel=1e-6) == 29.9
-    assert json.loads(result["raw"]) == result["positions"]
+_TAPE_50M_ENTRY = {
+    "sku": "sku-band-50",
+    "name": "Kreppband 50 m",
+    "unit": "m",
+    "pack_sizes": ["50 m"],
+    "synonyms": ["Abklebeband"],
+    "category": "Zubehör",
+    "brand": "Test",
+    "description": "Klebeband",
+    "raw": "Produkt: Kreppband 50 m",
+}
+
+
+_PROMPT2_CTX_Q = "CTX:{context}\nQ:{question}"
+_PROMPT2_DEFAULT = "{context}\n{question}"
+
+
+def _offer_case(
+    case_id: str,
+    llm_response: str,
+    products: List[str],
+    expected: Dict[str, Any],
+    *,
+    history: str = "",
+    retriever: Any = None,
+    prompt2: str = _PROMPT2_CTX_Q,
+    entry: Dict[str, Any] | None = None,
+    company_id: str | None = None,
+    synonyms: Dict[str, List[str]] | None = None,
+    thin_confidence: float | None = None,
+):
+    """One generate_offer_positions scenario; ``entry=None`` uses the default catalog."""
+
+    case = SimpleNamespace(
+        llm_response=llm_response,
+        products=products,
+        expected=expected,
+        history=history,
+        retriever=retriever,
+        prompt2=prompt2,
+        entry=entry,
+        company_id=company_id,
+        synonyms=synonyms or {},
+        thin_confidence=thin_confidence,
+    )
+    return pytest.param(case, id=case_id)
+
+
+OFFER_CASES = [
+    _offer_case(
+        "uses_llm2_and_catalog",
+        _PAINT_10L_REPLY,
+        ["Premiumfarbe weiß 10L"],
+        {"name": "Premiumfarbe weiß 10L", "gesamtpreis": 50},
+        history=_HISTORY_CONFIRMED_PAINT_10L,
+    ),
+    _offer_case(
+        "adjusts_price_for_pack_conversion",
+        '[{"nr": 1, "name": "Premiumfarbe weiß 10L", "menge": 1, "einheit": "Eimer", "epreis": 29.9, "gesamtpreis": 29.9}]',
+        ["Premiumfarbe weiß 10L"],
+        {"einheit": "L", "menge": 10, "epreis": 2.99, "gesamtpreis": 29.9},
+        history="Assistent:\n---\nstatus: bestätigt\nmaterialien:\n- name=Premiumfarbe weiß 10L, menge=1, einheit=Eimer\n---",
+    ),
+    _offer_case(
+        "adjusts_price_for_roll_conversion",
+        '[{"nr": 1, "name": "Kreppband 50 m", "menge": 1, "einheit": "Rolle", "epreis": 2.9, "gesamtpreis": 2.9}]',
+        ["Kreppband 50 m"],
+        {"einheit": "m", "menge": 50, "epreis": 2.9 / 50, "gesamtpreis": 2.9},
+        entry=_TAPE_50M_ENTRY,
+    ),
+    _offer_case(
+        "accepts_annotated_products",
+        _PAINT_10L_REPLY,
+        ["Premiumfarbe weiß 10L: 15 L (Reserve 5 L)"],
+        {"name": "Premiumfarbe weiß 10L"},
+        history=_HISTORY_CONFIRMED_PAINT_10L,
+    ),
+    _offer_case(
+        "accepts_synonym",
+        '[{"nr":1,"name":"Premiumfarbe weiß 10L","menge":5,"einheit":"L","epreis":5,"gesamtpreis":25}]',
+        ["Premium Tone 10L"],
+        {},
+        retriever=_EMPTY_RETRIEVER,
+        prompt2=_PROMPT2_DEFAULT,
+        company_id="demo",
+        synonyms={"premiumfarbe weiß 10l": ["premium tone 10l"]},
+    ),
+    _offer_case(
+        "accepts_vector_match",
+        '[{"nr":1,"name":"Premiumfarbe weiss matt","menge":5,"einheit":"L","epreis":5,"gesamtpreis":25}]',
+        ["Premiumfarbe matt extra"],
+        {},
+        retriever=_EMPTY_RETRIEVER,
+        prompt2=_PROMPT2_DEFAULT,
+        company_id="demo",
+        thin_confidence=0.9,
+    ),
+]
 
 
-def test_generate_offer_positions_adjusts_price_for_roll_conversion(tmp_path):
-    llm_response = (
-        '[{"nr": 1, "name": "Kreppband 50 m", "menge": 1, '
-        '"einheit": "Rolle", "epreis": 2.9, "gesamtpreis": 2.9}]'
-    )
-    tape_entry = {
-        "sku": "sku-band-50",
-        "name": "Kreppband 50 m",
-        "unit": "m",
-        "pack_sizes": ["50 m"],
-        "synonyms": ["Abklebeband"],
-        "category": "Zubehör",
-        "brand": "Test",
-        "description": "Klebeband",
-        "raw": "Produkt: Kreppband 50 m",
-    }
+@pytest.mark.parametrize("case", OFFER_CASES)
+def test_generate_offer_positions_variants(tmp_path, monkeypatch, make_context, case):
+    # None keeps the default catalog maps prebuilt on _PROTO_CTX.
     ctx = make_context(
         tmp_path,
-        llm2=FakeLLM(llm_response),
-        prompt2="CTX:{context}\nQ:{question}",
-        memory1=FakeMemory(),
-        retriever=None,
-        catalog_entry=tape_entry,
-        catalog_items=[tape_entry],
-        catalog_by_name={tape_entry["name"].lower(): tape_entry},
-        catalog_by_sku={tape_entry["sku"]: tape_entry},
-        catalog_text_by_name={tape_entry["name"].lower(): tape_entry["raw"]},
-        catalog_text_by_sku={tape_entry["sku"]: tape_entry["raw"]},
+        llm2=FakeLLM(case.llm_response),
+        prompt2=case.prompt2,
+        memory1=FakeMemory(case.history),
+        retriever=case.retriever,
+        catalog_entry=case.entry,
     )
-    payload = {"products": ["Kreppband 50 m"]}
+    entry = case.entry or _default_catalog_entry()
+    if case.synonyms:
+        monkeypatch.setattr(catalog_store, "list_synonyms", lambda company_id: case.synonyms)
+    if case.thin_confidence is not None:
+        hit = {"name": entry["name"], "sku": entry["sku"], "confidence": case.thin_confidence}
+        monkeypatch.setattr(qs, "_run_thin_catalog_search", lambda **kwargs: [hit])
 
-    result = generate_offer_positions(payload=payload, ctx=ctx, company_id=None)
+    result = generate_offer_positions(payload={"products": case.products}, ctx=ctx, company_id=case.company_id)
 
+    assert result["positions"]
     pos = result["positions"][0]
-    assert pos["einheit"] == "m"
-    assert pos["menge"] == 50
-    assert pytest.approx(pos["epreis"], rel=1e-6) == 2.9 / 50
-    assert pytest.approx(pos["gesamtpreis"], rel=1e-6) == 2.9
+    for key, value in case.expected.items():
+        assert pos[key] == (pytest.approx(value, rel=1e-6) if isinstance(value, float) else value), key
     assert json.loads(result["raw"]) == result["positions"]
 
 
-def test_generate_offer_positions_without_context_raises(tmp_path):
+def test_generate_offer_positions_without_context_raises(tmp_path, make_context):
     ctx = make_context(tmp_path, memory1=None, llm2=FakeLLM("[]"))
     with pytest.raises(ServiceError) as exc:
         generate_offer_positions(payload={}, ctx=ctx)
     assert exc.value.status_code == 400
 
 
-def test_generate_offer_positions_accepts_annotated_products(tmp_path):
-    llm_response = '[{"nr": 1, "name": "Premiumfarbe weiß 10L", "menge": 10, "einheit": "L", "epreis": 5, "gesamtpreis": 50}]'
-    memory = FakeMemory("Assistent:\n---\nstatus: bestätigt\nmaterialien:\n- name=Premiumfarbe weiß 10L, menge=10, einheit=L\n---")
-    ctx = make_context(
-        tmp_path,
-        llm2=FakeLLM(llm_response),
-        prompt2="CTX:{context}\nQ:{question}",
-        memory1=memory,
-        retriever=None,
-    )
-    payload = {"products": ["Premiumfarbe weiß 10L: 15 L (Reserve 5 L)"]}
-
-    result = generate_offer_positions(payload=payload, ctx=ctx, company_id=None)
-
-    assert result["positions"][0]["name"] == "Premiumfarbe weiß 10L"
-
-
-def test_generate_offer_positions_prefers_machine_block(tmp_path):
+def test_generate_offer_positions_prefers_machine_block(tmp_path, make_context):
     llm_response = (
         '[{"nr": 1, "name": "Premiumfarbe weiß 10L", "menge": 12, "einheit": "L", "epreis": 5, "gesamtpreis": 60}]'
     )
@@ -391,23 +554,7 @@ def test_generate_offer_positions_prefers_machine_block(tmp_path):
         prompt2="CTX:{context}\nQ:{question}",
         memory1=FakeMemory(history),
         retriever=None,
-        catalog_items=[entry, entry2],
-        catalog_by_name={
-            entry["name"].lower(): entry,
-            entry2["name"].lower(): entry2,
-        },
-        catalog_by_sku={
-            entry["sku"]: entry,
-            entry2["sku"]: entry2,
-        },
-        catalog_text_by_name={
-            entry["name"].lower(): entry.get("raw", ""),
-            entry2["name"].lower(): entry2.get("raw", ""),
-        },
-        catalog_text_by_sku={
-            entry["sku"]: entry.get("raw", ""),
-            entry2["sku"]: entry2.get("raw", ""),
-        },
+        **_build_catalog_indexes((entry, entry2)),
     )
     payload = {
         "message": "Innenanstrich einer Wandfläche von 20 m²: Der Tiefengrund wird mit 75 ml/m² kalkuliert.",
@@ -418,7 +565,7 @@ def test_generate_offer_positions_prefers_machine_block(tmp_path):
     assert result["positions"][0]["name"] == "Premiumfarbe weiß 10L"
 
 
-def test_generate_offer_positions_deduplicates_machine_items(tmp_path):
+def test_generate_offer_positions_deduplicates_machine_items(tmp_path, make_context):
     llm_response = (
         '[{"nr": 1, "name": "Dispersionsfarbe weiß, matt, 10 L", "menge": 12, '
         '"einheit": "L", "epreis": 5, "gesamtpreis": 60}]'
@@ -444,11 +591,7 @@ def test_generate_offer_positions_deduplicates_machine_items(tmp_path):
         prompt2="CTX:{context}\nQ:{question}",
         memory1=FakeMemory(history),
         retriever=None,
-        catalog_items=[entry],
-        catalog_by_name={entry["name"].lower(): entry},
-        catalog_by_sku={entry["sku"]: entry},
-        catalog_text_by_name={entry["name"].lower(): entry.get("raw", "")},
-        catalog_text_by_sku={entry["sku"]: entry.get("raw", "")},
+        catalog_entry=entry,
     )
 
     result = generate_offer_positions(payload={"products": ["Dispersionsfarbe weiß, matt, 10 L"]}, ctx=ctx, company_id=None)
@@ -457,21 +600,15 @@ def test_generate_offer_positions_deduplicates_machine_items(tmp_path):
     assert result["positions"][0]["menge"] == 12
 
 
-def test_render_offer_or_invoice_pdf(monkeypatch, tmp_path):
-    saved_path = tmp_path / "outputs" / "angebot.pdf"
-    saved_path.parent.mkdir(parents=True, exist_ok=True)
+def _fake_render_pdf(env, template_file, context, output_dir):
+    assert template_file.endswith(".html")
+    saved_path = Path(output_dir) / "angebot.pdf"
+    saved_path.write_text("pdf")
+    return saved_path
 
-    def fake_render(env, template_file, context, output_dir):  # pragma: no cover - patched
-        assert template_file.endswith(".html")
-        saved_path.write_text("pdf")
-        return saved_path
 
-    fake_module = SimpleNamespace(
-        render_pdf_from_template=fake_render,
-        DEFAULT_OFFER_TEMPLATE_ID="classic",
-        resolve_offer_template=lambda tpl_id: {"id": "classic", "file": "offer.html"},
-    )
-    monkeypatch.setitem(sys.modules, "backend.app.pdf", fake_module)
+def test_render_offer_or_invoice_pdf(fake_pdf, tmp_path, make_context):
+    fake_pdf(_fake_render_pdf)
     ctx = make_context(tmp_path)
     payload = {
         "positions": [{"menge": 2, "einheit": "L", "epreis": 5.0, "gesamtpreis": 0.0}],
@@ -485,7 +622,7 @@ def test_render_offer_or_invoice_pdf(monkeypatch, tmp_path):
     assert result["template_id"] == "classic"
 
 
-def test_wizard_flow_produces_suggestions(tmp_path):
+def test_wizard_flow_produces_suggestions(tmp_path, make_context):
     wizard_sessions: dict[str, dict] = {}
     llm1 = FakeLLM(
         "---\nstatus: schätzung\nmaterialien:\n- name=Dispersionsfarbe, menge=7, einheit=L\n---"
@@ -514,7 +651,7 @@ def test_wizard_flow_produces_suggestions(tmp_path):
     assert final["done"] is True
 
 
-def test_wizard_finalize_missing_session(tmp_path):
+def test_wizard_finalize_missing_session(tmp_path, make_context):
     ctx = make_context(tmp_path, wizard_sessions={})
     with pytest.raises(ServiceError):
         wizard_finalize(payload={"session_id": "missing"}, ctx=ctx)
@@ -529,14 +666,8 @@ def test_revenue_guard_detects_missing_primer(tmp_path):
     assert any(sug["name"].startswith("Tiefgrund") for sug in result["missing"])
 
 
-def test_search_catalog_returns_match(tmp_path):
-    entry = _default_catalog_entry()
-    entry["raw"] = "Produkt: Premiumfarbe weiß 10L"
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entry,
-        retriever=EmptyRetriever(),
-    )
+def test_search_catalog_returns_match(tmp_path, make_context):
+    ctx = make_context(tmp_path)
     result = search_catalog(query="Premiumfarbe", limit=3, company_id=None, ctx=ctx)
 
     assert result["count"] == 1
@@ -545,11 +676,11 @@ def test_search_catalog_returns_match(tmp_path):
 
 def test_custom_guard_materials_roundtrip(tmp_path, monkeypatch):
     # Ensure a clean config path per test
-    from backend.app.services import quote_service as qs
-
     config_path = tmp_path / "guard.json"
     monkeypatch.setattr(qs, "REVENUE_GUARD_CONFIG_PATH", config_path)
-    qs.GUARD_CONFIG_CACHE = None
+    # Restored afterwards: a leftover custom config would leak into whichever
+    # guard test the same xdist worker runs next.
+    monkeypatch.setattr(qs, "GUARD_CONFIG_CACHE", None)
 
     payload = {
         "items": [
@@ -591,6 +722,9 @@ def test_custom_guard_materials_roundtrip(tmp_path, monkeypatch):
     # Override disabled builtin should suppress the default suggestion
     assert not any(s["id"] == "primer_tiefgrund" for s in result["missing"])
 
+    # The guard run above was served from the in-memory cache; drop it so this
+    # one read goes back to disk and proves the config was persisted.
+    monkeypatch.setattr(qs, "GUARD_CONFIG_CACHE", None)
     loaded = qs.get_revenue_guard_materials()
     brandschutz = next(item for item in loaded["items"] if item["id"] == "brandschutz")
     assert brandschutz["keywords"] == ["brandschutz", "f90"]
@@ -598,7 +732,7 @@ def test_custom_guard_materials_roundtrip(tmp_path, monkeypatch):
     assert primer["name"] == "Spezialgrundierung"
 
 
-def test_chat_turn_blocks_unknown_materials(tmp_path):
+def test_chat_turn_blocks_unknown_materials(tmp_path, make_context):
     reply = (
         "Alles klar.\n---\nstatus: schätzung\nmaterialien:\n"
         "- name=Fantasieprodukt, menge=5, einheit=Stück\n---"
@@ -607,11 +741,7 @@ def test_chat_turn_blocks_unknown_materials(tmp_path):
         tmp_path,
         chain1=FakeChain(reply),
         memory1=FakeMemory(),
-        catalog_items=[],
-        catalog_by_name={},
-        catalog_by_sku={},
-        catalog_text_by_name={},
-        catalog_text_by_sku={},
+        **_build_catalog_indexes(()),
     )
     result = chat_turn(message="Bitte Angebot", ctx=ctx)
 
@@ -620,7 +750,7 @@ def test_chat_turn_blocks_unknown_materials(tmp_path):
     assert "- Fantasieprodukt" in result["reply"]
 
 
-def test_missing_catalog_handles_colon_annotations(tmp_path):
+def test_missing_catalog_handles_colon_annotations(tmp_path, make_context):
     ctx = make_context(tmp_path)
     materials = [{"name": "Premiumfarbe weiß 10L: 15 L (Reserve)", "menge": 15, "einheit": "L"}]
 
@@ -629,7 +759,7 @@ def test_missing_catalog_handles_colon_annotations(tmp_path):
     assert matches and not unknown
 
 
-def test_validate_materials_accepts_generic_kreppband(tmp_path):
+def test_validate_materials_accepts_generic_kreppband(tmp_path, make_context):
     entries = [
         {
             "sku": "sku_kb25",
@@ -656,12 +786,7 @@ def test_validate_materials_accepts_generic_kreppband(tmp_path):
     ]
     ctx = make_context(
         tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
+        **_build_catalog_indexes(entries),
     )
     matches, unknown = qs._validate_materials(
         [{"name": "Kreppband", "menge": 1, "einheit": "Rolle"}],
@@ -674,7 +799,7 @@ def test_validate_materials_accepts_generic_kreppband(tmp_path):
     assert matches[0]["canonical_name"].startswith("Kreppband")
 
 
-def test_validate_materials_accepts_generic_abdeckfolie(tmp_path):
+def test_validate_materials_accepts_generic_abdeckfolie(tmp_path, make_context):
     entries = [
         {
             "sku": "sku_folie20",
@@ -701,12 +826,7 @@ def test_validate_materials_accepts_generic_abdeckfolie(tmp_path):
     ]
     ctx = make_context(
         tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
+        **_build_catalog_indexes(entries),
     )
     matches, unknown = qs._validate_materials(
         [{"name": "Abdeckfolie", "menge": 1, "einheit": "Rolle"}],
@@ -719,7 +839,7 @@ def test_validate_materials_accepts_generic_abdeckfolie(tmp_path):
     assert matches[0]["canonical_name"].startswith("Abdeckfolie")
 
 
-def test_validate_materials_still_flags_unknown_products(tmp_path):
+def test_validate_materials_still_flags_unknown_products(tmp_path, make_context):
     entries = [
         {
             "sku": "sku_kb25",
@@ -735,12 +855,7 @@ def test_validate_materials_still_flags_unknown_products(tmp_path):
     ]
     ctx = make_context(
         tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
+        **_build_catalog_indexes(entries),
     )
     matches, unknown = qs._validate_materials(
         [{"name": "SuperDeko Farbe 3000", "menge": 1, "einheit": "L"}],
@@ -752,7 +867,7 @@ def test_validate_materials_still_flags_unknown_products(tmp_path):
     assert unknown[0]["query"] == "SuperDeko Farbe 3000"
 
 
-def test_validate_materials_accepts_kreppband_via_thin_candidates(tmp_path, monkeypatch):
+def test_validate_materials_accepts_kreppband_via_thin_candidates(tmp_path, monkeypatch, make_context):
     entry = {
         "sku": "sku_abkl_standard",
         "name": "Abklebeband 19 mm, Standard",
@@ -767,11 +882,6 @@ def test_validate_materials_accepts_kreppband_via_thin_candidates(tmp_path, monk
     ctx = make_context(
         tmp_path,
         catalog_entry=entry,
-        catalog_items=[entry],
-        catalog_by_name={entry["name"].lower(): entry},
-        catalog_by_sku={entry["sku"]: entry},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"]},
-        catalog_text_by_sku={entry["sku"]: entry["raw"]},
     )
     monkeypatch.setattr(
         qs,
@@ -790,18 +900,14 @@ def test_validate_materials_accepts_kreppband_via_thin_candidates(tmp_path, monk
     assert matches[0]["canonical_name"].startswith("Abklebeband")
 
 
-def test_generate_offer_positions_requires_known_products(tmp_path):
+def test_generate_offer_positions_requires_known_products(tmp_path, make_context):
     llm_response = '[{"nr": 1, "name": "Fantasieprodukt", "menge": 5, "einheit": "Stück", "epreis": 10, "gesamtpreis": 50}]'
     ctx = make_context(
         tmp_path,
         llm2=FakeLLM(llm_response),
         prompt2="{context}\n{question}",
-        retriever=EmptyRetriever(),
-        catalog_items=[],
-        catalog_by_name={},
-        catalog_by_sku={},
-        catalog_text_by_name={},
-        catalog_text_by_sku={},
+        retriever=_EMPTY_RETRIEVER,
+        **_build_catalog_indexes(()),
     )
     with pytest.raises(ServiceError) as exc:
         generate_offer_positions(payload={"products": ["Fantasieprodukt"]}, ctx=ctx)
@@ -811,179 +917,39 @@ def test_generate_offer_positions_requires_known_products(tmp_path):
     assert detail["message"].startswith("Angebot kann noch nicht erstellt werden")
 
 
-def test_generate_offer_positions_accepts_synonym(tmp_path, monkeypatch):
-    entry = _default_catalog_entry()
-    ctx = make_context(
-        tmp_path,
-        llm2=FakeLLM(
-            '[{"nr":1,"name":"Premiumfarbe weiß 10L","menge":5,"einheit":"L","epreis":5,"gesamtpreis":25}]'
-        ),
-        prompt2="{context}\n{question}",
-        catalog_entry=entry,
-    )
-
-    from backend.store import catalog_store
-
-    monkeypatch.setattr(catalog_store, "get_active_products", lambda company_id: [])
-    monkeypatch.setattr(
-        catalog_store,
-        "list_synonyms",
-        lambda company_id: {"premiumfarbe weiß 10l": ["premium tone 10l"]},
-    )
-
-    result = generate_offer_positions(
-        payload={"products": ["Premium Tone 10L"]},
-        ctx=ctx,
-        company_id="demo",
-    )
-    assert result["positions"]
-
-
-def test_generate_offer_positions_accepts_vector_match(tmp_path, monkeypatch):
-    entry = _default_catalog_entry()
-    ctx = make_context(
-        tmp_path,
-        llm2=FakeLLM(
-            '[{"nr":1,"name":"Premiumfarbe weiss matt","menge":5,"einheit":"L","epreis":5,"gesamtpreis":25}]'
-        ),
-        prompt2="{context}\n{question}",
-        catalog_entry=entry,
-    )
-
-    monkeypatch.setattr(
-        qs,
-        "_run_thin_catalog_search",
-        lambda **kwargs: [{"name": entry["name"], "sku": entry["sku"], "confidence": 0.9}],
-    )
-    from backend.store import catalog_store
-
-    monkeypatch.setattr(catalog_store, "get_active_products", lambda company_id: [])
-    monkeypatch.setattr(catalog_store, "list_synonyms", lambda company_id: {})
-
-    payload = {"products": ["Premiumfarbe matt extra"]}
-    result = generate_offer_positions(payload=payload, ctx=ctx, company_id="demo")
-    assert result["positions"]
-
-
-def test_offer_positions_use_quantity_override(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
-    initial_reply = (
-        "Start.\n---\nstatus: schätzung\nmaterialien:\n"
-        "- name=Innenfarbe weiß, menge=4, einheit=L\n"
-        "- name=Abdeckfolie 20 m², menge=18, einheit=m²\n"
-        "- name=Abklebeband 19 mm, menge=25, einheit=m\n---"
-    )
-    override_reply = (
-        "Mehr Band.\n---\nstatus: update\nmaterialien:\n"
-        "- name=Kreppband, menge=40, einheit=m\n---"
-    )
-    ctx.chain1 = FakeChain(initial_reply)
-    chat_turn(message="Schlafzimmer", ctx=ctx)
-    ctx.chain1 = FakeChain(override_reply)
-    chat_turn(message="Bitte mehr Band", ctx=ctx)
-    llm_response = json.dumps(
-        [
-            {"nr": 1, "name": "Innenfarbe weiß", "menge": 4, "einheit": "L", "epreis": 10, "gesamtpreis": 40},
-            {
-                "nr": 2,
-                "name": "Abklebeband 19 mm 25 m Rolle",
-                "menge": 1,
-                "einheit": "Rolle",
-                "epreis": 30,
-                "gesamtpreis": 30,
-            },
-        ]
-    )
-    ctx.llm2 = FakeLLM(llm_response)
+def test_offer_positions_use_quantity_override(tmp_path, make_context, override_catalog):
+    ctx = make_context(tmp_path, **override_catalog)
+    _chat(ctx, "Schlafzimmer", _REPLY_START_PAINT_FOIL_TAPE)
+    _chat(ctx, "Bitte mehr Band", _REPLY_MORE_TAPE_40M)
+    ctx.llm2 = FakeLLM(_PAINT_AND_TAPE_ROLL_REPLY)
     result = generate_offer_positions(payload={}, ctx=ctx)
-    tape = next(pos for pos in result["positions"] if "Abklebeband" in pos["name"])
+    tape = _positions_named(result, "Abklebeband")[0]
     assert tape["menge"] == 50
 
 
-def test_latest_override_wins(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
-    initial_reply = (
-        "Start.\n---\nstatus: schätzung\nmaterialien:\n"
-        "- name=Innenfarbe weiß, menge=4, einheit=L\n"
-        "- name=Abdeckfolie 20 m², menge=18, einheit=m²\n"
-        "- name=Abklebeband 19 mm, menge=25, einheit=m\n---"
-    )
-    override_reply_40 = (
-        "Mehr Band.\n---\nstatus: update\nmaterialien:\n"
-        "- name=Kreppband, menge=40, einheit=m\n---"
-    )
+def test_latest_override_wins(tmp_path, make_context, override_catalog):
+    ctx = make_context(tmp_path, **override_catalog)
     override_reply_35 = (
         "Doch etwas weniger.\n---\nstatus: update\nmaterialien:\n"
         "- name=Abklebeband 19 mm, menge=35, einheit=m\n---"
     )
-    ctx.chain1 = FakeChain(initial_reply)
-    chat_turn(message="Projektstart", ctx=ctx)
-    ctx.chain1 = FakeChain(override_reply_40)
-    chat_turn(message="Mehr Band", ctx=ctx)
-    ctx.chain1 = FakeChain(override_reply_35)
-    chat_turn(message="Doch weniger", ctx=ctx)
-    llm_response = json.dumps(
-        [
-            {"nr": 1, "name": "Innenfarbe weiß", "menge": 4, "einheit": "L", "epreis": 10, "gesamtpreis": 40},
-            {
-                "nr": 2,
-                "name": "Abklebeband 19 mm 25 m Rolle",
-                "menge": 1,
-                "einheit": "Rolle",
-                "epreis": 30,
-                "gesamtpreis": 30,
-            },
-        ]
-    )
-    ctx.llm2 = FakeLLM(llm_response)
+    _chat(ctx, "Projektstart", _REPLY_START_PAINT_FOIL_TAPE)
+    _chat(ctx, "Mehr Band", _REPLY_MORE_TAPE_40M)
+    _chat(ctx, "Doch weniger", override_reply_35)
+    ctx.llm2 = FakeLLM(_PAINT_AND_TAPE_ROLL_REPLY)
     result = generate_offer_positions(payload={}, ctx=ctx)
-    tape = next(pos for pos in result["positions"] if "Abklebeband" in pos["name"])
+    tape = _positions_named(result, "Abklebeband")[0]
     assert tape["menge"] == 50
 
 
-def test_override_with_unknown_product_is_blocked(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
-    initial_reply = (
-        "Start.\n---\nstatus: schätzung\nmaterialien:\n"
-        "- name=Innenfarbe weiß, menge=4, einheit=L\n"
-        "- name=Abdeckfolie 20 m², menge=18, einheit=m²\n"
-        "- name=Abklebeband 19 mm, menge=25, einheit=m\n---"
-    )
+def test_override_with_unknown_product_is_blocked(tmp_path, make_context, override_catalog):
+    ctx = make_context(tmp_path, **override_catalog)
     unknown_reply = (
         "Neues Produkt.\n---\nstatus: update\nmaterialien:\n"
         "- name=SuperDeko Farbe 3000, menge=5, einheit=L\n---"
     )
-    ctx.chain1 = FakeChain(initial_reply)
-    chat_turn(message="Start", ctx=ctx)
-    ctx.chain1 = FakeChain(unknown_reply)
-    result = chat_turn(message="Unbekanntes Produkt", ctx=ctx)
+    _chat(ctx, "Start", _REPLY_START_PAINT_FOIL_TAPE)
+    result = _chat(ctx, "Unbekanntes Produkt", unknown_reply)
     assert result["ready_for_offer"] is False
     assert "Hinweis zur Produktprüfung" in result["reply"]
     history = ctx.memory1.load_memory_variables({}).get("chat_history", "")
@@ -992,186 +958,104 @@ def test_override_with_unknown_product_is_blocked(tmp_path):
     assert not any("SuperDeko" in item.get("name", "") for item in latest)
 
 
-def test_locked_override_applies_to_paint(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
-    initial_reply = (
-        "Start.\n---\nstatus: schätzung\nmaterialien:\n"
-        "- name=Innenfarbe weiß, menge=4, einheit=L\n"
-        "- name=Abdeckfolie 20 m², menge=18, einheit=m²\n"
-        "- name=Abklebeband 19 mm, menge=25, einheit=m\n---"
-    )
+def test_locked_override_applies_to_paint(tmp_path, make_context, override_catalog):
+    ctx = make_context(tmp_path, **override_catalog)
     override_reply = (
         "Mehr Farbe.\n---\nstatus: update\nmaterialien:\n"
         "- name=Innenfarbe weiß, menge=6, einheit=L\n---"
     )
-    ctx.chain1 = FakeChain(initial_reply)
-    chat_turn(message="Los", ctx=ctx)
-    ctx.chain1 = FakeChain(override_reply)
-    chat_turn(message="Mehr Farbe", ctx=ctx)
-    llm_response = json.dumps(
-        [
-            {"nr": 1, "name": "Innenfarbe weiß", "menge": 5, "einheit": "L", "epreis": 12, "gesamtpreis": 60},
-            {"nr": 2, "name": "Abdeckfolie 20 m²", "menge": 18, "einheit": "m²", "epreis": 2, "gesamtpreis": 36},
-        ]
-    )
-    ctx.llm2 = FakeLLM(llm_response)
+    _chat(ctx, "Los", _REPLY_START_PAINT_FOIL_TAPE)
+    _chat(ctx, "Mehr Farbe", override_reply)
+    ctx.llm2 = FakeLLM(_PAINT_AND_FOIL_REPLY)
     result = generate_offer_positions(payload={}, ctx=ctx)
-    paint = next(pos for pos in result["positions"] if "Innenfarbe" in pos["name"])
+    paint = _positions_named(result, "Innenfarbe")[0]
     assert paint["einheit"] == "L"
     assert paint["menge"] >= 6
 
 
-def test_pack_conversion_keeps_base_units_for_tape(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
-    initial_reply = (
-        "Start.\n---\nstatus: schätzung\nmaterialien:\n"
-        "- name=Abklebeband 19 mm 25 m, menge=25, einheit=m, sku=sku-band\n---"
-    )
-    ctx.chain1 = FakeChain(initial_reply)
-    chat_turn(message="Tape", ctx=ctx)
-    llm_response = json.dumps(
-        [
-            {"nr": 1, "name": "Abklebeband 19 mm, Standard", "menge": 1, "einheit": "Stück", "epreis": 5, "gesamtpreis": 5}
-        ]
-    )
-    ctx.llm2 = FakeLLM(llm_response)
-    result = generate_offer_positions(payload={}, ctx=ctx)
-    tape_positions = [pos for pos in result["positions"] if "Abklebeband" in pos["name"]]
-    assert len(tape_positions) == 1
-    tape = tape_positions[0]
-    assert tape["einheit"] == "m"
-    assert tape["menge"] >= 25
-
-
-def test_pack_conversion_rounds_up_for_foil(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
-    initial_reply = (
-        "Start.\n---\nstatus: schätzung\nmaterialien:\n"
-        "- name=Abdeckfolie 20 m², menge=20, einheit=m², sku=sku-folie\n---"
-    )
-    override_reply = (
-        "Mehr Folie.\n---\nstatus: update\nmaterialien:\n"
-        "- name=Abdeckfolie 20 m², menge=30, einheit=m², sku=sku-folie\n---"
-    )
-    ctx.chain1 = FakeChain(initial_reply)
-    chat_turn(message="Projekt", ctx=ctx)
-    ctx.chain1 = FakeChain(override_reply)
-    chat_turn(message="Mehr Folie", ctx=ctx)
-    llm_response = json.dumps(
-        [
-            {"nr": 1, "name": "Abdeckfolie 20 m²", "menge": 1, "einheit": "Rolle", "epreis": 8, "gesamtpreis": 8},
-        ]
-    )
-    ctx.llm2 = FakeLLM(llm_response)
-    result = generate_offer_positions(payload={}, ctx=ctx)
-    foil = next(pos for pos in result["positions"] if "Abdeckfolie" in pos["name"])
-    assert foil["einheit"] == "m²"
-    assert foil["menge"] == 40
-    assert "locked_quantity" in foil.get("reasons", [])
-
-
-def test_pack_conversion_for_paint_bucket(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
-    initial_reply = (
-        "Start.\n---\nstatus: schätzung\nmaterialien:\n"
-        "- name=Innenfarbe weiß, menge=5, einheit=L, sku=sku-farbe\n---"
-    )
-    override_reply = (
-        "Mehr Farbe.\n---\nstatus: update\nmaterialien:\n"
-        "- name=Innenfarbe weiß, menge=6, einheit=L, sku=sku-farbe\n---"
-    )
-    ctx.chain1 = FakeChain(initial_reply)
-    chat_turn(message="Start", ctx=ctx)
-    ctx.chain1 = FakeChain(override_reply)
-    chat_turn(message="Mehr Farbe", ctx=ctx)
-    llm_response = json.dumps(
-        [
-            {"nr": 1, "name": "Innenfarbe weiß 10L Eimer", "menge": 1, "einheit": "Eimer", "epreis": 60, "gesamtpreis": 60},
-        ]
-    )
-    ctx.llm2 = FakeLLM(llm_response)
-    result = generate_offer_positions(payload={}, ctx=ctx)
-    paint = next(pos for pos in result["positions"] if "Innenfarbe" in pos["name"])
-    assert paint["einheit"] == "L"
-    assert paint["menge"] == 10
-
-
-def test_piece_based_unit_stays_stueck(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
-    initial_reply = (
-        "Start.\n---\nstatus: schätzung\nmaterialien:\n"
-        "- name=Farbroller 25 cm, menge=2, einheit=Stück, sku=sku-roller\n---"
-    )
-    ctx.chain1 = FakeChain(initial_reply)
-    chat_turn(message="Werkzeug", ctx=ctx)
-    llm_response = json.dumps(
-        [
-            {"nr": 1, "name": "Farbroller 25 cm", "menge": 1, "einheit": "Pack", "epreis": 8, "gesamtpreis": 8},
-        ]
-    )
+# chat turns (message, LLM1 reply), LLM2 reply, position name fragment, expected unit,
+# expected quantity, whether the quantity must match exactly (else: at least), expected reason
+PACK_CONVERSION_CASES = [
+    pytest.param(
+        (
+            (
+                "Tape",
+                "Start.\n---\nstatus: schätzung\nmaterialien:\n"
+                "- name=Abklebeband 19 mm 25 m, menge=25, einheit=m, sku=sku-band\n---",
+            ),
+        ),
+        _TAPE_PIECE_REPLY, "Abklebeband", "m", 25, False, None,
+        id="keeps_base_units_for_tape",
+    ),
+    pytest.param(
+        (
+            (
+                "Projekt",
+                "Start.\n---\nstatus: schätzung\nmaterialien:\n"
+                "- name=Abdeckfolie 20 m², menge=20, einheit=m², sku=sku-folie\n---",
+            ),
+            (
+                "Mehr Folie",
+                "Mehr Folie.\n---\nstatus: update\nmaterialien:\n"
+                "- name=Abdeckfolie 20 m², menge=30, einheit=m², sku=sku-folie\n---",
+            ),
+        ),
+        _FOIL_ROLL_REPLY, "Abdeckfolie", "m²", 40, True, "locked_quantity",
+        id="rounds_up_for_foil",
+    ),
+    pytest.param(
+        (
+            (
+                "Start",
+                "Start.\n---\nstatus: schätzung\nmaterialien:\n"
+                "- name=Innenfarbe weiß, menge=5, einheit=L, sku=sku-farbe\n---",
+            ),
+            (
+                "Mehr Farbe",
+                "Mehr Farbe.\n---\nstatus: update\nmaterialien:\n"
+                "- name=Innenfarbe weiß, menge=6, einheit=L, sku=sku-farbe\n---",
+            ),
+        ),
+        _PAINT_BUCKET_REPLY, "Innenfarbe", "L", 10, True, None,
+        id="for_paint_bucket",
+    ),
+    pytest.param(
+        (
+            (
+                "Werkzeug",
+                "Start.\n---\nstatus: schätzung\nmaterialien:\n"
+                "- name=Farbroller 25 cm, menge=2, einheit=Stück, sku=sku-roller\n---",
+            ),
+        ),
+        _ROLLER_PACK_REPLY, "Farbroller", "Stück", 2, False, None,
+        id="piece_based_unit_stays_stueck",
+    ),
+]
+
+
+@pytest.mark.parametrize("turns, llm_response, fragment, unit, menge, exact, reason", PACK_CONVERSION_CASES)
+def test_pack_conversion(
+    tmp_path, make_context, override_catalog, turns, llm_response, fragment, unit, menge, exact, reason
+):
+    ctx = make_context(tmp_path, **override_catalog)
+    for message, reply in turns:
+        _chat(ctx, message, reply)
     ctx.llm2 = FakeLLM(llm_response)
     result = generate_offer_positions(payload={}, ctx=ctx)
-    roller = next(pos for pos in result["positions"] if "Farbroller" in pos["name"])
-    assert roller["einheit"] == "Stück"
-    assert roller["menge"] >= 2
-
-
-def test_wall_paint_prefers_interior_product(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
+    matching = _positions_named(result, fragment)
+    assert len(matching) == 1
+    pos = matching[0]
+    assert pos["einheit"] == unit
+    if exact:
+        assert pos["menge"] == menge
+    else:
+        assert pos["menge"] >= menge
+    if reason is not None:
+        assert reason in pos.get("reasons", [])
+
+
+def test_wall_paint_prefers_interior_product(tmp_path, make_context, override_catalog):
+    ctx = make_context(tmp_path, **override_catalog)
     matches, unknown = qs._validate_materials(
         [{"name": "Innenwände streichen, weiße Wandfarbe"}],
         ctx,
@@ -1183,17 +1067,8 @@ def test_wall_paint_prefers_interior_product(tmp_path):
     assert product_type in {"wall_paint_interior", "ceiling_paint_interior"}
 
 
-def test_wood_preserver_selected_for_wood_context(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
+def test_wood_preserver_selected_for_wood_context(tmp_path, make_context, override_catalog):
+    ctx = make_context(tmp_path, **override_catalog)
     matches, unknown = qs._validate_materials(
         [{"name": "Holzschutz für Gartenzaun"}],
         ctx,
@@ -1205,17 +1080,8 @@ def test_wood_preserver_selected_for_wood_context(tmp_path):
     assert product_type in {"wood_preserver", "wood_paint"}
 
 
-def test_tape_and_foil_classifications(tmp_path):
-    entries = _override_catalog_entries()
-    ctx = make_context(
-        tmp_path,
-        catalog_entry=entries[0],
-        catalog_items=entries,
-        catalog_by_name={entry["name"].lower(): entry for entry in entries},
-        catalog_by_sku={entry["sku"]: entry for entry in entries},
-        catalog_text_by_name={entry["name"].lower(): entry["raw"] for entry in entries},
-        catalog_text_by_sku={entry["sku"]: entry["raw"] for entry in entries},
-    )
+def test_tape_and_foil_classifications(tmp_path, make_context, override_catalog):
+    ctx = make_context(tmp_path, **override_catalog)
     tape_matches, tape_unknown = qs._validate_materials([{"name": "Kreppband"}], ctx, company_id=None)
     assert not tape_unknown
     entry = ctx.catalog_by_sku.get(tape_matches[0]["sku"])
@@ -1,27 +1,17 @@
-import importlib
-import os
-from pathlib import Path
+from _dummy_embedder import DUMMY_EMBEDDER
+# index_manager reads through the top-level ``store`` package, so reset that one
+from retriever import index_manager
+from store import catalog_store
 
-import pytest
 
+def _reset_modules(tmp_path):
+    catalog_store.reset_state(f"sqlite:///{tmp_path / 'catalog_dynamic.db'}")
+    index_manager.reset_state(embedder=DUMMY_EMBEDDER)
+    return catalog_store, index_manager
 
-def _reload_modules(tmp_path, monkeypatch):
-    db_path = tmp_path / "catalog_dynamic.db"
-    monkeypatch.setenv("KALKULAI_DB_URL", f"sqlite:///{db_path}")
-    store = importlib.reload(__import__("backend.store.catalog_store", fromlist=["dummy"]))
-    store.init_db()
-    index_manager = importlib.reload(__import__("backend.retriever.index_manager", fromlist=["dummy"]))
 
-    class DummyEmbedder:
-        def encode(self, texts):
-            return [[float(len(text) or 1.0)] for text in texts]
-
-    index_manager._EMBEDDER = DummyEmbedder()
-    return store, index_manager
-
-
-def test_ensure_index_builds_from_db(tmp_path, monkeypatch):
-    store, index_manager = _reload_modules(tmp_path, monkeypatch)
+def test_ensure_index_builds_from_db(tmp_path):
+    store, index_manager = _reset_modules(tmp_path)
     store.upsert_product("demo", {"sku": "SKU-A", "name": "Innenfarbe Weiß", "description": "10 L"})
     store.upsert_product("demo", {"sku": "SKU-B", "name": "Putzgrund Fassade", "description": "Aussen"})
 
@@ -34,8 +24,8 @@ def test_ensure_index_builds_from_db(tmp_path, monkeypatch):
     assert hits and hits[0]["sku"] in {"SKU-A", "SKU-B"}
 
 
-def test_update_index_incremental_add_then_delete(tmp_path, monkeypatch):
-    store, index_manager = _reload_modules(tmp_path, monkeypatch)
+def test_update_index_incremental_add_then_delete(tmp_path):
+    store, index_manager = _reset_modules(tmp_path)
     store.upsert_product("demo", {"sku": "SKU-1", "name": "Haftgrund Holz"})
     index_manager.ensure_index("demo")
 
@@ -48,8 +38,8 @@ def test_update_index_incremental_add_then_delete(tmp_path, monkeypatch):
     assert index_manager.get_index_stats("demo")["docs"] == 1
 
 
-def test_rebuild_index_forces_fresh_state(tmp_path, monkeypatch):
-    store, index_manager = _reload_modules(tmp_path, monkeypatch)
+def test_rebuild_index_forces_fresh_state(tmp_path):
+    store, index_manager = _reset_modules(tmp_path)
     store.upsert_product("demo", {"sku": "SKU-1", "name": "Innenfarbe"})
     index_manager.ensure_index("demo")
 
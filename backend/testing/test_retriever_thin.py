@@ -1,16 +1,10 @@
 from __future__ import annotations
 
 from pathlib import Path
-import sys
 
-BACKEND_ROOT = Path(__file__).resolve().parents[1]
-REPO_ROOT = BACKEND_ROOT.parent
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
+from backend.retriever.thin import search_catalog_thin
 
-from backend.retriever.thin import search_catalog_thin  # noqa: E402
-
-SYN_PATH = BACKEND_ROOT / "shared" / "normalize" / "synonyms.yaml"
+SYN_PATH = Path(__file__).resolve().parents[1] / "shared" / "normalize" / "synonyms.yaml"
 
 CATALOG_FIXTURE = [
     {"sku": "SKU-1", "name": "Haftgrund LF weiß 5 L", "unit": "L", "category": "primer"},
@@ -3,17 +3,11 @@ import os
 os.environ.setdefault("ALLOW_ALL_ORIGINS", "1")
 
 import importlib
-import sys
-from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
 
-
-# Ensure the backend package is importable when pytest runs from repo root.
-BACKEND_ROOT = Path(__file__).resolve().parents[1]
-if str(BACKEND_ROOT) not in sys.path:
-    sys.path.insert(0, str(BACKEND_ROOT))
+pytestmark = pytest.mark.slow
 
 
 def _load_app() -> TestClient:
@@ -1,20 +1,20 @@
-import importlib
 import os
+import sqlite3
+import threading
 from pathlib import Path
 
 import pytest
 
-import backend.store.catalog_store as catalog_store
+from backend.store import catalog_store
 
 
-def _reload_store(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
-    db_path = tmp_path / "test.db"
-    monkeypatch.setenv("DB_URL", f"sqlite:///{db_path}")
-    return importlib.reload(catalog_store)
+def _reset_store(tmp_path: Path):
+    catalog_store.reset_state(f"sqlite:///{tmp_path / 'test.db'}")
+    return catalog_store
 
 
-def test_product_crud(tmp_path, monkeypatch):
-    store = _reload_store(tmp_path, monkeypatch)
+def test_product_crud(tmp_path):
+    store = _reset_store(tmp_path)
     store.init_db()
 
     result = store.upsert_product(
@@ -35,8 +35,8 @@ def test_product_crud(tmp_path, monkeypatch):
     assert products_after[0]["is_active"] is False
 
 
-def test_synonym_flow(tmp_path, monkeypatch):
-    store = _reload_store(tmp_path, monkeypatch)
+def test_synonym_flow(tmp_path):
+    store = _reset_store(tmp_path)
     store.init_db()
 
     store.add_synonym("demo", "tiefgrund", "tief grund")
@@ -49,8 +49,8 @@ def test_synonym_flow(tmp_path, monkeypatch):
     assert mapping["putzgrund"] == ["putz-grund"]
 
 
-def test_reactivate_product_brings_back_soft_deleted_entry(tmp_path, monkeypatch):
-    store = _reload_store(tmp_path, monkeypatch)
+def test_reactivate_product_brings_back_soft_deleted_entry(tmp_path):
+    store = _reset_store(tmp_path)
     store.init_db()
 
     store.upsert_product("demo", {"sku": "SKU-2", "name": "Tiefgrund 10 L"})
@@ -66,3 +66,89 @@ def test_reactivate_product_brings_back_soft_deleted_entry(tmp_path, monkeypatch
     visible_products = store.list_products("demo", include_deleted=False)
     assert len(visible_products) == 1
     assert visible_products[0]["sku"] == "SKU-2"
+
+
+def test_bulk_upsert_shares_timestamp(tmp_path):
+    store = _reset_store(tmp_path)
+    store.init_db()
+
+    written = store.upsert_products_bulk(
+        "demo",
+        [
+            {"sku": "SKU-1", "name": "Innenfarbe Weiß"},
+            {"sku": "SKU-2", "name": "Tiefgrund 10 L", "is_active": False},
+        ],
+    )
+    assert written == 2
+
+    products = {prod["sku"]: prod for prod in store.list_products("demo", include_deleted=True)}
+    assert products["SKU-1"]["is_active"] is True
+    assert products["SKU-2"]["is_active"] is False
+    assert products["SKU-1"]["updated_at"] == products["SKU-2"]["updated_at"]
+    assert [prod["sku"] for prod in store.get_active_products("demo")] == ["SKU-1"]
+
+
+def test_bulk_add_synonyms_upserts_confidence(tmp_path):
+    store = _reset_store(tmp_path)
+    store.init_db()
+
+    store.add_synonym("demo", "tiefgrund", "tief grund")
+    written = store.add_synonyms_bulk(
+        "demo",
+        [("tiefgrund", "tief grund"), ("tiefgrund", " tief-grund "), ("putzgrund", "putz-grund")],
+        confidence=0.7,
+    )
+    assert written == 3
+
+    mapping = store.list_synonyms("demo")
+    assert set(mapping["tiefgrund"]) == {"tief grund", "tief-grund"}
+    assert mapping["putzgrund"] == ["putz-grund"]
+
+    with pytest.raises(ValueError):
+        store.add_synonyms_bulk("demo", [("tiefgrund", " ")])
+
+
+def test_active_products_see_writes_from_other_connections(tmp_path):
+    store = _reset_store(tmp_path)
+    store.init_db()
+
+    store.upsert_product("demo", {"sku": "SKU-1", "name": "Innenfarbe Weiß"})
+    first = store.get_active_products("demo")
+    first[0]["name"] = "changed by caller"
+    assert store.get_active_products("demo")[0]["name"] == "Innenfarbe Weiß"
+
+    # e.g. the catalog CLI importing from another process
+    other = sqlite3.connect(tmp_path / "test.db")
+    other.execute("UPDATE products SET is_active=0 WHERE company_id='demo'")
+    other.commit()
+    other.close()
+
+    assert store.get_active_products("demo") == []
+
+
+def test_truncate_on_another_thread_invalidates_cached_reads(tmp_path):
+    store = _reset_store(tmp_path)
+    store.init_db()
+
+    store.upsert_product("demo", {"sku": "SKU-1", "name": "Innenfarbe Weiß"})
+    store.add_synonym("demo", "innenfarbe", "wandfarbe")
+    assert len(store.get_active_products("demo")) == 1
+    assert store.list_synonyms("demo") == {"innenfarbe": ["wandfarbe"]}
+
+    # truncate_all only clears the cache of the thread that runs it
+    worker = threading.Thread(target=store.truncate_all)
+    worker.start()
+    worker.join()
+
+    assert store.get_active_products("demo") == []
+    assert store.list_synonyms("demo") == {}
+
+
+def test_bulk_add_synonyms_handles_large_imports(tmp_path):
+    store = _reset_store(tmp_path)
+    store.init_db()
+
+    # 7000 rows x 5 columns is more bound variables than one SQLite statement allows.
+    pairs = [(f"canon-{i // 10}", f"variant-{i}") for i in range(7000)]
+    assert store.add_synonyms_bulk("demo", pairs) == 7000
+    assert sum(len(variants) for variants in store.list_synonyms("demo").values()) == 7000